@@ -0,0 +1,217 @@
+import os
+import threading
+import time
+import requests
+from requests.adapters import HTTPAdapter
+
+# Flic/Socialverse API configuration
+FLIC_API_URL = os.getenv('FLIC_API_URL', 'https://api.socialverseapp.com')
+FLIC_TOKEN = os.getenv("FLIC_TOKEN", "flic_b1c6b09d98e2d4884f61b9b3131dbb27a6af84788e4a25db067a22008ea9cce5")
+FLIC_POOL_SIZE = int(os.getenv('FLIC_POOL_SIZE', '10'))
+FLIC_CONNECT_TIMEOUT = float(os.getenv('FLIC_CONNECT_TIMEOUT', '3.05'))
+FLIC_READ_TIMEOUT = float(os.getenv('FLIC_READ_TIMEOUT', '10'))
+FLIC_BREAKER_THRESHOLD = int(os.getenv('FLIC_BREAKER_THRESHOLD', '3'))
+FLIC_BREAKER_RESET = float(os.getenv('FLIC_BREAKER_RESET', '30'))
+
+# Per-endpoint (connect, read) timeouts in seconds
+ENDPOINT_TIMEOUTS = {
+    'posts_summary': (FLIC_CONNECT_TIMEOUT, FLIC_READ_TIMEOUT),
+}
+
+ENDPOINT_PATHS = {
+    'posts_summary': '/posts/summary/get',
+}
+
+# Upper bounds of the latency histogram buckets in milliseconds
+LATENCY_BUCKETS_MS = (10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+
+class LatencyHistogram:
+    """Thread-safe bucketed histogram of request latencies"""
+
+    def __init__(self, buckets=LATENCY_BUCKETS_MS):
+        self.buckets = buckets
+        self._counts = [0] * (len(buckets) + 1)
+        self._total_ms = 0.0
+        self._lock = threading.Lock()
+
+    def observe(self, elapsed_ms):
+        """Record one latency sample"""
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if elapsed_ms <= bound:
+                index = i
+                break
+        with self._lock:
+            self._counts[index] += 1
+            self._total_ms += elapsed_ms
+
+    def snapshot(self):
+        """Get the sample count, mean and per-bucket counts"""
+        with self._lock:
+            counts = list(self._counts)
+            total_ms = self._total_ms
+        count = sum(counts)
+        labels = [f"<={bound}ms" for bound in self.buckets] + [f">{self.buckets[-1]}ms"]
+        return {
+            'count': count,
+            'mean_ms': round(total_ms / count, 1) if count else None,
+            'buckets': dict(zip(labels, counts))
+        }
+
+class CircuitOpenError(requests.RequestException):
+    """Raised when a call is short-circuited because the upstream API keeps failing"""
+
+class CircuitBreaker:
+    """Fails fast after repeated upstream failures, probing again after a cooldown.
+
+    closed    -> calls go through; `failure_threshold` consecutive failures open it
+    open      -> calls raise CircuitOpenError until `reset_timeout` has passed
+    half_open -> a single probe call goes through; success closes the breaker,
+                 failure opens it again
+    """
+
+    CLOSED = 'closed'
+    OPEN = 'open'
+    HALF_OPEN = 'half_open'
+
+    def __init__(self, failure_threshold=FLIC_BREAKER_THRESHOLD, reset_timeout=FLIC_BREAKER_RESET):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.short_circuits = 0
+        self._lock = threading.Lock()
+
+    def call(self, func, *args, **kwargs):
+        """Call `func` through the breaker"""
+        self._before_call()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            if self._is_failure(e):
+                self._record_failure()
+            else:
+                self._record_success()
+            raise
+        self._record_success()
+        return result
+
+    def is_rejecting(self):
+        """Check whether a call now would be short-circuited, without counting it or starting a probe"""
+        with self._lock:
+            if self.state == self.OPEN:
+                return time.monotonic() - self.opened_at < self.reset_timeout
+            # A half-open breaker already has its probe in flight
+            return self.state == self.HALF_OPEN
+
+    def get_stats(self):
+        """Get the breaker state and counters"""
+        with self._lock:
+            return {
+                'state': self.state,
+                'failures': self.failures,
+                'short_circuits': self.short_circuits
+            }
+
+    def _before_call(self):
+        with self._lock:
+            if self.state == self.CLOSED:
+                return
+            if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+                # Let this caller probe the upstream; everyone else keeps failing fast
+                self.state = self.HALF_OPEN
+                return
+            self.short_circuits += 1
+        raise CircuitOpenError("Video service is temporarily unavailable")
+
+    def _record_success(self):
+        with self._lock:
+            self.state = self.CLOSED
+            self.failures = 0
+
+    def _record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == self.HALF_OPEN or self.failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self.opened_at = time.monotonic()
+
+    @staticmethod
+    def _is_failure(error):
+        """Only connection problems, timeouts and 5xx responses count against the upstream"""
+        if isinstance(error, requests.HTTPError) and error.response is not None:
+            return error.response.status_code >= 500
+        return True
+
+class FlicClient:
+    """Pooled, keep-alive HTTP client for the Flic/Socialverse API.
+
+    One client is shared by every Streamlit session in the process. The
+    underlying urllib3 connection pool is thread-safe, so concurrent
+    sessions reuse warm connections instead of paying DNS, TCP and TLS
+    setup on each call.
+    """
+
+    def __init__(self, base_url=FLIC_API_URL, token=FLIC_TOKEN, pool_size=FLIC_POOL_SIZE, timeouts=None):
+        self.base_url = base_url.rstrip('/')
+        self.timeouts = {**ENDPOINT_TIMEOUTS, **(timeouts or {})}
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'Flic-Token': token,
+            'Accept': 'application/json',
+            'Accept-Encoding': 'gzip, deflate',
+            'Connection': 'keep-alive'
+        })
+        self.breaker = CircuitBreaker()
+        self._histograms = {}
+        self._lock = threading.Lock()
+
+    def get(self, endpoint, params=None):
+        """GET an API endpoint through the circuit breaker and return the decoded JSON body"""
+        return self.breaker.call(self._get, endpoint, params)
+
+    def _get(self, endpoint, params=None):
+        url = f"{self.base_url}{ENDPOINT_PATHS[endpoint]}"
+        timeout = self.timeouts.get(endpoint, (FLIC_CONNECT_TIMEOUT, FLIC_READ_TIMEOUT))
+        start = time.perf_counter()
+        try:
+            response = self.session.get(url, params=params, timeout=timeout)
+            response.raise_for_status()
+            return response.json()
+        finally:
+            self._histogram(endpoint).observe((time.perf_counter() - start) * 1000)
+
+    def get_posts_summary(self, page=1, page_size=10):
+        """Get one page of post summaries"""
+        return self.get('posts_summary', params={'page': page, 'page_size': page_size})
+
+    def get_latency_stats(self):
+        """Get latency histograms for every endpoint called so far"""
+        with self._lock:
+            histograms = dict(self._histograms)
+        return {endpoint: histogram.snapshot() for endpoint, histogram in histograms.items()}
+
+    def close(self):
+        """Close pooled connections"""
+        self.session.close()
+
+    def _histogram(self, endpoint):
+        with self._lock:
+            if endpoint not in self._histograms:
+                self._histograms[endpoint] = LatencyHistogram()
+            return self._histograms[endpoint]
+
+_flic_client = None
+_flic_client_lock = threading.Lock()
+
+def get_flic_client():
+    """Get the process-wide Flic API client"""
+    global _flic_client
+    with _flic_client_lock:
+        if _flic_client is None:
+            _flic_client = FlicClient()
+        return _flic_client
@@ -36,34 +36,47 @@ def set_custom_css():
         unsafe_allow_html=True
     )
 
-import requests
-import json
 import datetime
 from datetime import datetime, timedelta
-import os
 import random
-from data import DataManager
+import tempfile
+from data import UserData, get_data_manager
 from content import ContentProvider
+from chat_backend import chat_metrics, create_chat_backend
+from semantic import SEMANTIC_MATCHING, get_semantic_index
 from database import DatabaseManager, get_db_manager
+from async_database import get_async_db_manager, run_async
+from api_client import CircuitOpenError, get_flic_client
+from video import VIDEO_PAGE_SIZE, get_video_cache, get_video_store, iter_video_catalog, start_prefetcher, video_url_of
+
+# Chat messages loaded from the database per page
+CHAT_PAGE_SIZE = 50
 
 # Initialize managers
 set_custom_css()
-data_manager = DataManager()
-content_provider = ContentProvider()
+data_manager = get_data_manager()
+content_provider = ContentProvider(semantic_index=get_semantic_index() if SEMANTIC_MATCHING else None)
+chat_backend = create_chat_backend(content_provider)
 db_manager = get_db_manager()
+async_db_manager = get_async_db_manager()
+video_prefetcher = start_prefetcher()
+video_store = get_video_store()
 
 # Initialize session state and database
 if 'current_page' not in st.session_state:
     st.session_state.current_page = 'welcome'
-if 'user_data' not in st.session_state:
-    st.session_state.user_data = data_manager.load_user_data()
 if 'chat_history' not in st.session_state:
     st.session_state.chat_history = []
+if 'chat_history_cursor' not in st.session_state:
+    st.session_state.chat_history_cursor = None
 if 'db_user' not in st.session_state:
     # Create database tables if they don't exist
     db_manager.create_tables()
     # Get or create default user
     st.session_state.db_user = db_manager.get_or_create_user()
+if 'user_data' not in st.session_state:
+    # Each session reads and writes only its own user's JSON shard
+    st.session_state.user_data = data_manager.load_user_data(st.session_state.db_user.username)
 
 def navigate_to(page):
     """Navigate to a specific page"""
@@ -77,36 +90,79 @@ def save_progress(category, topic, completed=True):
     
     # Also save to JSON for backward compatibility
     today = datetime.now().strftime('%Y-%m-%d')
-    if 'progress' not in st.session_state.user_data:
-        st.session_state.user_data['progress'] = {}
-    if today not in st.session_state.user_data['progress']:
-        st.session_state.user_data['progress'][today] = {}
-    
-    st.session_state.user_data['progress'][today][category] = {
+    data_manager.record_progress(st.session_state.db_user.username, st.session_state.user_data, today, category, {
         'topic': topic,
         'completed': completed,
         'timestamp': datetime.now().isoformat()
+    })
+
+# Sample spiritual videos, also used as the fallback while the video API is unavailable
+SAMPLE_VIDEOS = [
+    {
+        'title': 'Philippians 4:13 - I Can Do All Things Through Christ',
+        'url': 'https://www.youtube.com/watch?v=LYjBzQ_NCAM',
+        'verse': 'I can do all this through him who gives me strength.',
+        'reference': 'Philippians 4:13'
+    },
+    {
+        'title': 'Psalm 23 - The Lord is My Shepherd',
+        'url': 'https://www.youtube.com/watch?v=icoM5X-TIek',
+        'verse': 'The Lord is my shepherd, I lack nothing.',
+        'reference': 'Psalm 23:1'
+    },
+    {
+        'title': 'John 3:16 - For God So Loved the World',
+        'url': 'https://www.youtube.com/watch?v=kbx6eOCuZgA',
+        'verse': 'For God so loved the world that he gave his one and only Son, that whoever believes in him shall not perish but have eternal life.',
+        'reference': 'John 3:16'
     }
-    data_manager.save_user_data(st.session_state.user_data)
+]
 
-def get_video_content():
-    """Fetch video content from external API"""
+def get_video_content(limit=VIDEO_PAGE_SIZE):
+    """Fetch up to `limit` videos, paging through the cached catalog lazily"""
+    videos = []
+    if limit <= 0:
+        return videos
     try:
-        api_token = os.getenv("FLIC_TOKEN", "flic_b1c6b09d98e2d4884f61b9b3131dbb27a6af84788e4a25db067a22008ea9cce5")
-        headers = {"Flic-Token": api_token}
-        response = requests.get(
-            "https://api.socialverseapp.com/posts/summary/get?page=1&page_size=1000",
-            headers=headers,
-            timeout=10
-        )
-        if response.status_code == 200:
-            return response.json()
-        else:
-            return None
+        # Pages the prefetcher keeps warm are only ever read from memory
+        for video_item in iter_video_catalog(memory_only_pages=video_prefetcher.pages):
+            videos.append(video_item)
+            if len(videos) >= limit:
+                break
+    except CircuitOpenError:
+        # The video API is known to be down; fall back without waiting on it
+        pass
     except Exception as e:
         st.error(f"Failed to fetch video content: {str(e)}")
+    return videos
+
+def find_topic_video(topic, reference=None):
+    """Find a locally stored catalog video for a topic, without calling the video API"""
+    try:
+        return video_store.find(topic, reference)
+    except Exception as e:
+        print(f"Error looking up video for {topic}: {e}")
         return None
 
+def load_chat_history(user_id, earlier=False):
+    """Load the newest page of chat history from the database, or the page before what is shown"""
+    before = st.session_state.chat_history_cursor if earlier else None
+    messages, st.session_state.chat_history_cursor = db_manager.get_chat_page(
+        user_id, limit=CHAT_PAGE_SIZE, before=before
+    )
+    page = [
+        {
+            'sender': msg.sender,
+            'text': msg.message_text,
+            'timestamp': msg.timestamp.isoformat()
+        }
+        for msg in messages
+    ]
+    if earlier:
+        st.session_state.chat_history = page + st.session_state.chat_history
+    else:
+        st.session_state.chat_history = page
+
 def render_welcome_page():
     """Render the welcome page"""
     st.markdown("# 🙏 Spirit AI")
@@ -225,12 +281,7 @@ def render_goal_setting():
                 'start_date': start_date.isoformat(),
                 'created_at': datetime.now().isoformat()
             }
-            
-            if 'goals' not in st.session_state.user_data:
-                st.session_state.user_data['goals'] = []
-            
-            st.session_state.user_data['goals'].append(goal_data)
-            data_manager.save_user_data(st.session_state.user_data)
+            data_manager.record_goal(st.session_state.db_user.username, st.session_state.user_data, goal_data)
             
             navigate_to('content')
     
@@ -281,8 +332,12 @@ def render_devotion_content():
     st.info(devotion['declaration'])
     
     st.markdown("## 🎥 Suggested Video")
-    if devotion['video_url']:
-        st.video(devotion['video_url'])
+    video_url = devotion['video_url']
+    if not video_url:
+        matched_video = find_topic_video(topic, devotion['reference'])
+        video_url = matched_video['video_url'] if matched_video else None
+    if video_url:
+        st.video(video_url)
     else:
         st.warning("Video content not available at the moment.")
 
@@ -317,6 +372,11 @@ def render_meditation_content():
     st.markdown(f"*{meditation['verse']}*")
     st.markdown(f"**{meditation['reference']}**")
     
+    matched_video = find_topic_video(topic, meditation['reference'])
+    if matched_video and matched_video['video_url']:
+        with st.expander(f"🎥 {matched_video['title']}"):
+            st.video(matched_video['video_url'])
+    
     st.markdown("## 🤔 Reflection")
     st.markdown("**What does this reveal about God?**")
     st.text_area("Your thoughts:", height=100, key="meditation_reflection")
@@ -371,37 +431,17 @@ def render_video_verse():
     
     st.markdown("---")
     
-    # Sample spiritual videos for demonstration
-    sample_videos = [
-        {
-            'title': 'Philippians 4:13 - I Can Do All Things Through Christ',
-            'url': 'https://www.youtube.com/watch?v=LYjBzQ_NCAM',
-            'verse': 'I can do all this through him who gives me strength.',
-            'reference': 'Philippians 4:13'
-        },
-        {
-            'title': 'Psalm 23 - The Lord is My Shepherd',
-            'url': 'https://www.youtube.com/watch?v=icoM5X-TIek',
-            'verse': 'The Lord is my shepherd, I lack nothing.',
-            'reference': 'Psalm 23:1'
-        },
-        {
-            'title': 'John 3:16 - For God So Loved the World',
-            'url': 'https://www.youtube.com/watch?v=kbx6eOCuZgA',
-            'verse': 'For God so loved the world that he gave his one and only Son, that whoever believes in him shall not perish but have eternal life.',
-            'reference': 'John 3:16'
-        }
-    ]
-    
-    # Try to get video content from API first
-    video_data = get_video_content()
+    # Prefer a stored video matching the current topic, then the catalog's first video
+    topic = st.session_state.get('selected_topic')
+    matched_video = find_topic_video(topic) if topic else None
+    videos = [matched_video] if matched_video else get_video_content(limit=1)
     
-    if video_data and 'data' in video_data and video_data['data']:
+    if videos:
         st.markdown("## Today's Video Verse")
-        video_item = video_data['data'][0]  # Get first video
+        video_item = videos[0]  # Get first video
         st.markdown(f"**{video_item.get('title', 'Spiritual Video')}**")
         
-        video_url = video_item.get('video_url') or video_item.get('url')
+        video_url = video_url_of(video_item)
         if video_url:
             st.video(video_url)
         else:
@@ -409,7 +449,7 @@ def render_video_verse():
     else:
         # Use sample videos as fallback
         st.markdown("## Today's Video Verse")
-        selected_video = random.choice(sample_videos)
+        selected_video = random.choice(SAMPLE_VIDEOS)
         
         st.markdown(f"**{selected_video['title']}**")
         st.markdown(f"*{selected_video['verse']}*")
@@ -418,7 +458,7 @@ def render_video_verse():
         st.video(selected_video['url'])
         
         st.markdown("### More Video Verses")
-        for i, video in enumerate(sample_videos):
+        for i, video in enumerate(SAMPLE_VIDEOS):
             if video != selected_video:
                 with st.expander(f"{video['title']}"):
                     st.markdown(f"*{video['verse']}*")
@@ -434,20 +474,34 @@ def render_video_bible():
     
     st.markdown("---")
     
-    video_data = get_video_content()
+    if 'video_bible_count' not in st.session_state:
+        st.session_state.video_bible_count = VIDEO_PAGE_SIZE
     
-    if video_data and 'data' in video_data:
+    videos = get_video_content(limit=st.session_state.video_bible_count)
+    
+    if videos:
         st.markdown("## Available Bible Videos")
         
-        for i, video_item in enumerate(video_data['data'][:10]):  # Show first 10 videos
+        for i, video_item in enumerate(videos):
             with st.expander(f"{video_item.get('title', f'Video {i+1}')}"):
-                video_url = video_item.get('video_url') or video_item.get('url')
+                video_url = video_url_of(video_item)
                 if video_url:
                     st.video(video_url)
                 else:
                     st.warning("Video URL not available for this content.")
+        
+        # Only offer more when the catalog filled the current window
+        if len(videos) >= st.session_state.video_bible_count:
+            if st.button("Load More Videos", use_container_width=True):
+                st.session_state.video_bible_count += VIDEO_PAGE_SIZE
+                st.rerun()
     else:
-        st.error("Unable to fetch video content. Please try again later.")
+        st.info("Live videos are unavailable right now. Here are some favorites instead.")
+        for video in SAMPLE_VIDEOS:
+            with st.expander(f"{video['title']}"):
+                st.markdown(f"*{video['verse']}*")
+                st.markdown(f"**{video['reference']}**")
+                st.video(video['url'])
 
 def render_chat():
     """Render chat interface"""
@@ -462,6 +516,11 @@ def render_chat():
     chat_container = st.container()
     
     with chat_container:
+        if st.session_state.chat_history_cursor:
+            if st.button("⬆️ Load Earlier Messages"):
+                load_chat_history(st.session_state.db_user.id, earlier=True)
+                st.rerun()
+        
         if st.session_state.chat_history:
             for message in st.session_state.chat_history:
                 if message['sender'] == 'user':
@@ -476,31 +535,31 @@ def render_chat():
     # Chat input at bottom
     if prompt := st.chat_input("Type your message here..."):
         user_id = st.session_state.db_user.id
+        user_timestamp = datetime.utcnow()
         
-        # Save user message to database
-        db_manager.save_chat_message(user_id, 'user', prompt)
+        history = st.session_state.chat_history
+        with st.chat_message("user"):
+            st.write(prompt)
         
-        # Add user message to session
+        # Stream the AI response into the page as it is generated
+        with st.chat_message("assistant"):
+            reply = chat_backend.stream(prompt, history)
+            st.write_stream(reply)
+        
+        # Save both messages to the database in one write, once the reply is complete
+        db_manager.save_chat_turn(user_id, prompt, reply.text, user_timestamp)
+        
+        # Add both messages to session
         st.session_state.chat_history.append({
             'sender': 'user',
             'text': prompt,
             'timestamp': datetime.now().isoformat()
         })
-        
-        # Generate AI response
-        ai_response = content_provider.get_ai_response(prompt)
-        
-        # Save AI response to database
-        db_manager.save_chat_message(user_id, 'ai', ai_response)
-        
-        # Add AI response to session
         st.session_state.chat_history.append({
             'sender': 'ai',
-            'text': ai_response,
+            'text': reply.text,
             'timestamp': datetime.now().isoformat()
         })
-        
-        st.rerun()
 
 def render_dashboard():
     """Render user dashboard with database integration"""
@@ -513,8 +572,13 @@ def render_dashboard():
     
     user_id = st.session_state.db_user.id
     
-    # Get comprehensive stats from database
-    stats = db_manager.get_user_stats(user_id)
+    # Get stats, goals and recent activity from database (cached until the next write),
+    # concurrently when an asyncio driver is installed
+    if async_db_manager:
+        dashboard_data = run_async(async_db_manager.get_dashboard_data(user_id, days=7))
+    else:
+        dashboard_data = db_manager.get_dashboard_data(user_id, days=7)
+    stats = dashboard_data['stats']
     
     # Display overview stats
     col1, col2, col3, col4 = st.columns(4)
@@ -529,38 +593,36 @@ def render_dashboard():
         st.metric("Completion Rate", f"{completion_rate}%")
     
     # Current Goals from database
-    goals = db_manager.get_user_goals(user_id, active_only=True)
+    goals = dashboard_data['goals']
     if goals:
         st.markdown("## 🎯 Current Goals")
         for goal in goals:
-            with st.expander(f"{goal.category.title()} - {goal.topic}"):
-                st.markdown(f"**Program Length:** {goal.program_length} days")
-                st.markdown(f"**Started:** {goal.start_date.strftime('%Y-%m-%d')}")
+            with st.expander(f"{goal['category'].title()} - {goal['topic']}"):
+                st.markdown(f"**Program Length:** {goal['program_length']} days")
+                st.markdown(f"**Started:** {goal['start_date'].strftime('%Y-%m-%d')}")
                 
                 # Calculate progress
-                days_elapsed = (datetime.now().date() - goal.start_date.date()).days
-                progress = min(days_elapsed / goal.program_length * 100, 100)
+                days_elapsed = (datetime.now().date() - goal['start_date'].date()).days
+                progress = min(days_elapsed / goal['program_length'] * 100, 100)
                 
                 st.progress(progress / 100)
                 st.markdown(f"Progress: {progress:.1f}%")
                 
-                if st.button(f"Mark Goal Complete", key=f"complete_{goal.id}"):
+                if st.button(f"Mark Goal Complete", key=f"complete_{goal['id']}"):
                     # Update goal status in database
-                    from database import Goal
-                    db_manager.session.query(Goal).filter_by(id=goal.id).update({'is_active': False})
-                    db_manager.session.commit()
+                    db_manager.complete_goal(goal['id'])
                     st.success("Goal marked as complete!")
                     st.rerun()
     
     # Recent Activity from database
-    recent_progress = db_manager.get_user_progress(user_id, days=7)
+    recent_progress = dashboard_data['recent_progress']
     if recent_progress:
         st.markdown("## 📈 Recent Activity (Last 7 Days)")
         
         # Group by date
         activity_by_date = {}
         for progress in recent_progress:
-            date_str = progress.completion_date.strftime('%Y-%m-%d')
+            date_str = progress['completion_date'].strftime('%Y-%m-%d')
             if date_str not in activity_by_date:
                 activity_by_date[date_str] = []
             activity_by_date[date_str].append(progress)
@@ -569,7 +631,7 @@ def render_dashboard():
         for date_str in sorted(activity_by_date.keys(), reverse=True):
             st.markdown(f"**{date_str}:**")
             for progress in activity_by_date[date_str]:
-                st.markdown(f"  ✅ {progress.category.title()}: {progress.topic}")
+                st.markdown(f"  ✅ {progress['category'].title()}: {progress['topic']}")
     else:
         st.info("Start your spiritual journey today! Complete your first devotion, prayer, or meditation to see your progress here.")
     
@@ -589,15 +651,7 @@ def render_dashboard():
     
     # Load chat history from database
     if st.button("🔄 Load Chat History from Database"):
-        chat_history = db_manager.get_chat_history(user_id)
-        st.session_state.chat_history = [
-            {
-                'sender': msg.sender,
-                'text': msg.message_text,
-                'timestamp': msg.timestamp.isoformat()
-            }
-            for msg in chat_history
-        ]
+        load_chat_history(user_id)
         st.success("Chat history loaded from database!")
         st.rerun()
 
@@ -660,67 +714,29 @@ def render_settings():
     
     with col1:
         if st.button("📤 Export All Data", use_container_width=True):
-            # Export user data from database
-            goals = db_manager.get_user_goals(user_id, active_only=False)
-            progress = db_manager.get_user_progress(user_id, days=365)
-            chat_history = db_manager.get_chat_history(user_id, limit=1000)
-            
-            export_data = {
-                'user': {
-                    'id': user_id,
-                    'username': st.session_state.db_user.username,
-                    'email': st.session_state.db_user.email
-                },
-                'goals': [
-                    {
-                        'category': goal.category,
-                        'topic': goal.topic,
-                        'program_length': goal.program_length,
-                        'start_date': goal.start_date.isoformat(),
-                        'is_active': goal.is_active
-                    }
-                    for goal in goals
-                ],
-                'progress': [
-                    {
-                        'category': prog.category,
-                        'topic': prog.topic,
-                        'completed': prog.completed,
-                        'completion_date': prog.completion_date.isoformat(),
-                        'notes': prog.notes
-                    }
-                    for prog in progress
-                ],
-                'chat_history': [
-                    {
-                        'sender': msg.sender,
-                        'message': msg.message_text,
-                        'timestamp': msg.timestamp.isoformat()
-                    }
-                    for msg in chat_history
-                ]
-            }
-            
-            st.download_button(
-                "Download JSON Data",
-                data=json.dumps(export_data, indent=2),
-                file_name=f"dscpl_data_{datetime.now().strftime('%Y%m%d')}.json",
-                mime="application/json"
-            )
+            # Stream the full history from the database into a compressed temp file
+            with tempfile.TemporaryFile() as export_file:
+                db_manager.write_user_export(user_id, export_file, compress=True)
+                export_file.seek(0)
+                # Streamlit serves downloads from memory, so only the compressed bytes are held
+                st.download_button(
+                    "Download Data (NDJSON, gzip)",
+                    data=export_file.read(),
+                    file_name=f"dscpl_data_{datetime.now().strftime('%Y%m%d')}.ndjson.gz",
+                    mime="application/gzip"
+                )
     
     with col2:
         if st.button("🗑️ Clear All Data", use_container_width=True):
             if st.button("⚠️ Confirm Delete", use_container_width=True):
                 # Clear all user data from database
-                from database import ChatMessage, Progress, Goal
-                db_manager.session.query(ChatMessage).filter_by(user_id=user_id).delete()
-                db_manager.session.query(Progress).filter_by(user_id=user_id).delete()
-                db_manager.session.query(Goal).filter_by(user_id=user_id).delete()
-                db_manager.session.commit()
+                db_manager.clear_user_data(user_id)
                 
                 # Clear session data
                 st.session_state.chat_history = []
-                st.session_state.user_data = {}
+                st.session_state.chat_history_cursor = None
+                st.session_state.user_data = UserData()
+                data_manager.save_user_data(st.session_state.db_user.username, st.session_state.user_data)
                 
                 st.success("All data cleared successfully!")
                 st.rerun()
@@ -739,26 +755,69 @@ def render_settings():
     
     with col2:
         if st.button("Sync Session Data"):
-            # Sync any session data that might not be in database
-            for date, activities in st.session_state.user_data.get('progress', {}).items():
-                for category, data in activities.items():
-                    db_manager.save_progress(user_id, category, data['topic'], data['completed'])
-            st.success("Session data synced to database!")
+            # Upsert session data that might not be in database; re-syncing is a no-op
+            counts = db_manager.sync_user_data(user_id, st.session_state.user_data)
+            added = counts['progress']['inserted'] + counts['goals']['inserted']
+            changed = counts['progress']['updated'] + counts['goals']['updated']
+            st.success(f"Session data synced to database! ({added} added, {changed} updated)")
     
     with col3:
         if st.button("Load Chat History"):
-            chat_history = db_manager.get_chat_history(user_id)
-            st.session_state.chat_history = [
-                {
-                    'sender': msg.sender,
-                    'text': msg.message_text,
-                    'timestamp': msg.timestamp.isoformat()
-                }
-                for msg in chat_history
-            ]
+            load_chat_history(user_id)
             st.success("Chat history loaded from database!")
             st.rerun()
     
+    # Performance
+    st.markdown("## 📈 Performance")
+    cache_stats = get_video_cache().get_stats()
+    col1, col2, col3, col4 = st.columns(4)
+    with col1:
+        st.metric("Video Cache Hits", cache_stats['hits'] + cache_stats['stale_hits'])
+    with col2:
+        st.metric("Video Cache Misses", cache_stats['misses'])
+    with col3:
+        st.metric("Catalog Refreshes", cache_stats['refreshes'])
+    with col4:
+        age = cache_stats['age_seconds']
+        st.metric("Catalog Age", f"{age:.0f}s" if age is not None else "—")
+    
+    prefetch_status = video_prefetcher.get_status()
+    if prefetch_status['last_refresh']:
+        st.markdown(
+            f"**Video catalog prefetch:** last refreshed {prefetch_status['last_refresh'].strftime('%H:%M:%S')} "
+            f"in {prefetch_status['last_duration_ms']} ms"
+        )
+        if prefetch_status['last_error']:
+            st.warning(f"Last catalog prefetch failed: {prefetch_status['last_error']}")
+    else:
+        st.markdown("**Video catalog prefetch:** warming up...")
+    
+    query_cache_stats = db_manager.query_cache.get_stats()
+    st.markdown(
+        f"**Dashboard query cache:** {query_cache_stats['hits']} hits, {query_cache_stats['misses']} misses, "
+        f"{query_cache_stats['entries']} entries"
+    )
+    st.markdown(f"**Videos in local store:** {video_store.count()}")
+    
+    breaker_stats = get_flic_client().breaker.get_stats()
+    st.markdown(
+        f"**Video API circuit:** {breaker_stats['state'].replace('_', '-')} "
+        f"({breaker_stats['failures']} recent failures, {breaker_stats['short_circuits']} fast fallbacks)"
+    )
+    
+    chat_stats = chat_metrics.get_stats()
+    if chat_stats['turns']:
+        tokens_per_second = chat_stats['tokens_per_second']
+        st.markdown(
+            f"**Chat replies:** {chat_stats['turns']} turn(s) ({chat_stats['fallbacks']} fallbacks), "
+            f"mean time to first token {chat_stats['ttft']['mean_ms']} ms, mean total {chat_stats['total']['mean_ms']} ms, "
+            f"{tokens_per_second if tokens_per_second is not None else '—'} tokens/s"
+        )
+    
+    for endpoint, histogram in get_flic_client().get_latency_stats().items():
+        st.markdown(f"**API latency ({endpoint}):** {histogram['count']} requests, mean {histogram['mean_ms']} ms")
+        st.bar_chart(histogram['buckets'])
+    
     if st.button("Save Settings"):
         st.success("Settings saved successfully!")
 
@@ -788,4 +847,8 @@ def main():
         render_settings()
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        # Hand this script run's database connection back to the pool
+        db_manager.close()
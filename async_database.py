@@ -0,0 +1,234 @@
+import asyncio
+import itertools
+import queue
+import threading
+from datetime import datetime
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+import database
+from database import (Base, DATABASE_URL, EXPORT_CHUNK_SIZE, DatabaseManager, SessionLocal, flush_chat_write_queue,
+                      get_chat_write_queue, get_engine_options, get_sqlite_pragmas, install_sqlite_pragmas, user_query_cache)
+from migrations import run_migrations
+
+# Async drivers used in place of the sync DBAPI for each backend
+ASYNC_DRIVERS = {
+    'sqlite': ('sqlite+aiosqlite', 'aiosqlite'),
+    'postgresql': ('postgresql+asyncpg', 'asyncpg'),
+    'postgres': ('postgresql+asyncpg', 'asyncpg'),
+}
+
+def get_async_database_url(database_url):
+    """Rewrite a database URL to use the matching asyncio driver"""
+    scheme, rest = database_url.split('://', 1)
+    backend = scheme.split('+', 1)[0]
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No asyncio driver configured for {backend}")
+    return f"{ASYNC_DRIVERS[backend][0]}://{rest}"
+
+def async_driver_available(database_url=DATABASE_URL):
+    """Check whether the asyncio driver for a database URL is installed"""
+    backend = database_url.split('://', 1)[0].split('+', 1)[0]
+    if backend not in ASYNC_DRIVERS:
+        return False
+    try:
+        __import__(ASYNC_DRIVERS[backend][1])
+    except ImportError:
+        return False
+    return True
+
+class AsyncDatabaseManager:
+    """Manages database operations for the DSCPL app on SQLAlchemy's asyncio extension.
+
+    Offers the same methods as DatabaseManager as coroutines. Each call runs in
+    its own AsyncSession, so independent reads can be awaited concurrently with
+    asyncio.gather(). The query logic itself is shared with DatabaseManager and
+    runs through AsyncSession.run_sync(), so both managers keep the same stats
+    bookkeeping and query cache. Data exports stream from a blocking cursor and
+    file, so they run on a worker thread with a sync session instead.
+    """
+
+    def __init__(self, database_url=DATABASE_URL, query_cache=user_query_cache):
+        self.engine = create_async_engine(get_async_database_url(database_url), **get_engine_options(database_url))
+        install_sqlite_pragmas(self.engine.sync_engine, get_sqlite_pragmas())
+        self.session_factory = async_sessionmaker(self.engine, expire_on_commit=False)
+        self.query_cache = query_cache
+
+    async def create_tables(self):
+        """Create all database tables and bring existing ones up to date"""
+        async with self.engine.begin() as connection:
+            await connection.run_sync(Base.metadata.create_all)
+        await asyncio.to_thread(run_migrations, database.engine)
+
+    async def get_or_create_user(self, username="default_user", email=None):
+        """Get existing user or create a new one"""
+        return await self._call('get_or_create_user', username, email)
+
+    async def create_goal(self, user_id, category, topic, program_length, start_date):
+        """Create a new goal for a user"""
+        return await self._call('create_goal', user_id, category, topic, program_length, start_date)
+
+    async def complete_goal(self, goal_id):
+        """Mark a goal as no longer active"""
+        return await self._call('complete_goal', goal_id)
+
+    async def get_user_goals(self, user_id, active_only=True):
+        """Get all goals for a user"""
+        return await self._call('get_user_goals', user_id, active_only)
+
+    async def save_progress(self, user_id, category, topic, completed=True, notes=None):
+        """Save user progress for a completed activity"""
+        return await self._call('save_progress', user_id, category, topic, completed, notes)
+
+    async def get_user_progress(self, user_id, days=30, since=None):
+        """Get user progress for the last N days, or since a given UTC datetime"""
+        return await self._call('get_user_progress', user_id, days, since)
+
+    async def save_chat_message(self, user_id, sender, message_text):
+        """Save a chat message"""
+        return await self._call('save_chat_message', user_id, sender, message_text)
+
+    async def save_chat_messages(self, user_id, messages):
+        """Save several (sender, message_text, timestamp) chat messages in one transaction"""
+        return await self._call('save_chat_messages', user_id, messages)
+
+    async def save_chat_turn(self, user_id, user_text, ai_text, user_timestamp=None):
+        """Save a user message and the AI reply, using the configured CHAT_WRITE_MODE"""
+        messages = [
+            ('user', user_text, user_timestamp or datetime.utcnow()),
+            ('ai', ai_text, datetime.utcnow())
+        ]
+        if database.CHAT_WRITE_MODE == 'sync':
+            await self.save_chat_messages(user_id, messages)
+        elif database.CHAT_WRITE_MODE == 'group':
+            await asyncio.wrap_future(get_chat_write_queue().put(user_id, messages, urgent=True))
+        else:
+            get_chat_write_queue().put(user_id, messages)
+
+    async def get_chat_page(self, user_id, limit=50, before=None):
+        """Get up to `limit` chat messages older than the `before` cursor, newest first"""
+        # Wait for queued chat writes off the event loop
+        await asyncio.to_thread(flush_chat_write_queue)
+        return await self._call('get_chat_page', user_id, limit, before)
+
+    async def get_chat_history(self, user_id, limit=50):
+        """Get the most recent chat history for a user"""
+        messages, _ = await self.get_chat_page(user_id, limit=limit)
+        return messages
+
+    async def get_user_stats(self, user_id):
+        """Get comprehensive user statistics"""
+        return await self._call('get_user_stats', user_id)
+
+    async def get_dashboard_data(self, user_id, days=7):
+        """Get stats, active goals and recent progress for the dashboard, loading them concurrently"""
+        stats, goals, recent_progress = await asyncio.gather(
+            self.get_user_stats(user_id),
+            self._call('get_active_goals_data', user_id),
+            self._call('get_recent_progress_data', user_id, days)
+        )
+        return {
+            'stats': stats,
+            'goals': goals,
+            'recent_progress': recent_progress
+        }
+
+    async def sync_user_data(self, user_id, user_data):
+        """Bulk upsert the progress and goals of a session/legacy JSON document in one transaction"""
+        return await self._call('sync_user_data', user_id, user_data)
+
+    async def iter_user_export(self, user_id, chunk_size=EXPORT_CHUNK_SIZE):
+        """Async-iterate a user's export records, one JSON-ready dict per row.
+
+        The streaming query runs on a worker thread with its own sync session
+        and hands over one chunk of records at a time, so memory stays flat
+        and the event loop never waits on the cursor.
+        """
+        chunks = queue.Queue(maxsize=2)
+        stop = threading.Event()
+
+        def hand_over(item):
+            while not stop.is_set():
+                try:
+                    chunks.put(item, timeout=0.1)
+                    return
+                except queue.Full:
+                    pass
+
+        def produce():
+            try:
+                with SessionLocal() as session:
+                    manager = DatabaseManager(session_registry=lambda: session, query_cache=self.query_cache)
+                    records = manager.iter_user_export(user_id, chunk_size)
+                    while not stop.is_set():
+                        chunk = list(itertools.islice(records, chunk_size))
+                        hand_over(chunk)
+                        if not chunk:
+                            return
+            except Exception as e:
+                hand_over(e)
+
+        threading.Thread(target=produce, name="async-export", daemon=True).start()
+        try:
+            while True:
+                chunk = await asyncio.to_thread(chunks.get)
+                if isinstance(chunk, Exception):
+                    raise chunk
+                if not chunk:
+                    return
+                for record in chunk:
+                    yield record
+        finally:
+            # Stop the worker if the consumer stopped early
+            stop.set()
+
+    async def write_user_export(self, user_id, fileobj, compress=False, chunk_size=EXPORT_CHUNK_SIZE):
+        """Stream a user's data export as NDJSON to a binary file on a worker thread, and return the record count"""
+        def write():
+            with SessionLocal() as session:
+                manager = DatabaseManager(session_registry=lambda: session, query_cache=self.query_cache)
+                return manager.write_user_export(user_id, fileobj, compress, chunk_size)
+        return await asyncio.to_thread(write)
+
+    async def rebuild_user_stats(self, user_id=None):
+        """Recompute stored statistics from the raw tables for one user, or for every user"""
+        return await self._call('rebuild_user_stats', user_id)
+
+    async def clear_user_data(self, user_id):
+        """Delete a user's chat messages, progress and goals"""
+        return await self._call('clear_user_data', user_id)
+
+    async def close(self):
+        """Close pooled connections"""
+        await self.engine.dispose()
+
+    async def _call(self, method, *args):
+        """Run a DatabaseManager method on a fresh AsyncSession"""
+        async with self.session_factory() as session:
+            def run(sync_session):
+                manager = DatabaseManager(session_registry=lambda: sync_session, query_cache=self.query_cache)
+                return getattr(manager, method)(*args)
+            return await session.run_sync(run)
+
+_async_db_manager = None
+_event_loop = None
+_lock = threading.Lock()
+
+def get_async_db_manager():
+    """Get the process-wide async database manager, or None if no asyncio driver is installed"""
+    global _async_db_manager
+    with _lock:
+        if _async_db_manager is None and async_driver_available():
+            _async_db_manager = AsyncDatabaseManager()
+        return _async_db_manager
+
+def run_async(coroutine, timeout=None):
+    """Run a coroutine on the shared background event loop and wait for its result.
+
+    Pooled async connections belong to the loop that opened them, so every
+    call from Streamlit's script threads goes through one long-lived loop.
+    """
+    global _event_loop
+    with _lock:
+        if _event_loop is None:
+            _event_loop = asyncio.new_event_loop()
+            threading.Thread(target=_event_loop.run_forever, name="async-db-loop", daemon=True).start()
+    return asyncio.run_coroutine_threadsafe(coroutine, _event_loop).result(timeout)
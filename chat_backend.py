@@ -0,0 +1,252 @@
+import os
+import threading
+import time
+
+try:
+    import openai
+except ImportError:
+    openai = None
+
+from api_client import LatencyHistogram
+from content import get_content_store
+
+# Reply engine: 'keyword' (built-in intent matching) or 'openai' (any OpenAI-compatible chat completions API)
+CHAT_BACKEND = os.getenv('CHAT_BACKEND', 'keyword')
+# OpenAI-compatible endpoint, key and model used by the 'openai' backend
+CHAT_API_URL = os.getenv('CHAT_API_URL', 'https://api.openai.com/v1')
+CHAT_API_KEY = os.getenv('CHAT_API_KEY', os.getenv('OPENAI_API_KEY', ''))
+CHAT_MODEL = os.getenv('CHAT_MODEL', 'gpt-4o-mini')
+# Seconds to wait for the connection and for each streamed chunk
+CHAT_TIMEOUT = float(os.getenv('CHAT_TIMEOUT', '30'))
+CHAT_MAX_TOKENS = int(os.getenv('CHAT_MAX_TOKENS', '400'))
+# Earlier messages sent along with each prompt as conversation context
+CHAT_HISTORY_MESSAGES = int(os.getenv('CHAT_HISTORY_MESSAGES', '10'))
+
+class ChatTurnMetrics:
+    """Timing of one reply: time to first token, tokens per second and total latency"""
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.started = time.perf_counter()
+        self.first_token = None
+        self.finished = None
+        self.chunks = 0
+        # Completion tokens reported by the server; chunks are counted otherwise
+        self.tokens = None
+        self.fallback = False
+        self.error = None
+
+    @property
+    def ttft_ms(self):
+        if self.first_token is None:
+            return None
+        return round((self.first_token - self.started) * 1000, 1)
+
+    @property
+    def total_ms(self):
+        if self.finished is None:
+            return None
+        return round((self.finished - self.started) * 1000, 1)
+
+    @property
+    def token_count(self):
+        return self.tokens if self.tokens is not None else self.chunks
+
+    @property
+    def tokens_per_second(self):
+        """Generation rate after the first token, or None for single-chunk replies"""
+        if self.first_token is None or self.finished is None or self.token_count < 2:
+            return None
+        elapsed = self.finished - self.first_token
+        return round((self.token_count - 1) / elapsed, 1) if elapsed > 0 else None
+
+    def as_dict(self):
+        return {
+            'backend': self.backend,
+            'ttft_ms': self.ttft_ms,
+            'tokens': self.token_count,
+            'tokens_per_second': self.tokens_per_second,
+            'total_ms': self.total_ms,
+            'fallback': self.fallback,
+            'error': self.error
+        }
+
+class ChatMetrics:
+    """Process-wide reply timings across all chat turns"""
+
+    def __init__(self):
+        self.ttft = LatencyHistogram()
+        self.total = LatencyHistogram()
+        self._turns = 0
+        self._fallbacks = 0
+        self._tokens = 0
+        self._generation_seconds = 0.0
+        self._last = None
+        self._lock = threading.Lock()
+
+    def observe(self, metrics):
+        """Record one finished turn"""
+        if metrics.ttft_ms is not None:
+            self.ttft.observe(metrics.ttft_ms)
+        self.total.observe(metrics.total_ms)
+        with self._lock:
+            self._turns += 1
+            self._fallbacks += metrics.fallback
+            if metrics.tokens_per_second is not None:
+                self._tokens += metrics.token_count - 1
+                self._generation_seconds += metrics.finished - metrics.first_token
+            self._last = metrics.as_dict()
+
+    def get_stats(self):
+        """Get turn counts, overall tokens per second, the last turn and the latency histograms"""
+        with self._lock:
+            stats = {
+                'turns': self._turns,
+                'fallbacks': self._fallbacks,
+                'tokens_per_second': round(self._tokens / self._generation_seconds, 1) if self._generation_seconds else None,
+                'last_turn': self._last
+            }
+        stats['ttft'] = self.ttft.snapshot()
+        stats['total'] = self.total.snapshot()
+        return stats
+
+# Built once per process
+chat_metrics = ChatMetrics()
+
+class ChatStream:
+    """A reply in progress: iterate it for text chunks as they arrive.
+
+    Timing is recorded while it is consumed, and once the iteration ends
+    `text` holds the full reply and `metrics` the finished turn, so the
+    caller can persist the text after the last chunk.
+    """
+
+    def __init__(self, backend, prompt, history):
+        self.backend = backend
+        self.prompt = prompt
+        self.history = history
+        self.metrics = None
+        self.text = None
+
+    def __iter__(self):
+        metrics = self.metrics = ChatTurnMetrics(self.backend.name)
+        parts = []
+        try:
+            for chunk in self.backend.generate(self.prompt, self.history, metrics):
+                if not chunk:
+                    continue
+                if metrics.first_token is None:
+                    metrics.first_token = time.perf_counter()
+                metrics.chunks += 1
+                parts.append(chunk)
+                yield chunk
+        finally:
+            metrics.finished = time.perf_counter()
+            self.text = ''.join(parts)
+            chat_metrics.observe(metrics)
+
+class ChatBackend:
+    """Produces chat replies as a stream of text chunks"""
+
+    name = 'base'
+
+    def stream(self, prompt, history=()):
+        """Start a reply to prompt, given earlier messages as dicts with 'sender' and 'text'"""
+        return ChatStream(self, prompt, list(history)[-CHAT_HISTORY_MESSAGES:] if CHAT_HISTORY_MESSAGES else [])
+
+    def reply(self, prompt, history=()):
+        """Get a whole reply at once"""
+        stream = self.stream(prompt, history)
+        for _ in stream:
+            pass
+        return stream.text
+
+    def generate(self, prompt, history, metrics):
+        """Yield the reply text in chunks; may set metrics.tokens from the server's usage report"""
+        raise NotImplementedError
+
+class KeywordChatBackend(ChatBackend):
+    """Canned replies picked by intent keywords, returned as a single chunk"""
+
+    name = 'keyword'
+
+    def __init__(self, content_provider):
+        self.content_provider = content_provider
+
+    def generate(self, prompt, history, metrics):
+        yield self.content_provider.get_ai_response(prompt)
+
+class OpenAIChatBackend(ChatBackend):
+    """Streams replies from an OpenAI-compatible chat completions API.
+
+    If the request fails before any text has arrived, the reply comes from
+    the fallback backend instead; a failure mid-reply keeps what was
+    already streamed.
+    """
+
+    name = 'openai'
+
+    def __init__(self, client, model=CHAT_MODEL, max_tokens=CHAT_MAX_TOKENS, fallback=None):
+        self.client = client
+        self.model = model
+        self.max_tokens = max_tokens
+        self.fallback = fallback
+
+    def build_messages(self, prompt, history):
+        """System prompt, then earlier messages, then the new prompt"""
+        messages = [{'role': 'system', 'content': get_content_store().section('chat')['system_prompt']}]
+        for message in history:
+            role = 'user' if message['sender'] == 'user' else 'assistant'
+            messages.append({'role': role, 'content': message['text']})
+        messages.append({'role': 'user', 'content': prompt})
+        return messages
+
+    def generate(self, prompt, history, metrics):
+        streamed = False
+        try:
+            with self.client.chat.completions.create(
+                model=self.model,
+                messages=self.build_messages(prompt, history),
+                max_tokens=self.max_tokens,
+                stream=True,
+                stream_options={'include_usage': True}
+            ) as response:
+                for chunk in response:
+                    if chunk.usage is not None:
+                        metrics.tokens = chunk.usage.completion_tokens
+                    if chunk.choices and chunk.choices[0].delta.content:
+                        streamed = True
+                        yield chunk.choices[0].delta.content
+        except Exception as e:
+            # API errors and transport errors from whichever HTTP library the client uses
+            print(f"Error streaming chat reply: {e}")
+            metrics.error = str(e)
+            if not streamed and self.fallback is not None:
+                metrics.fallback = True
+                yield from self.fallback.generate(prompt, history, metrics)
+
+_chat_client = None
+_chat_client_lock = threading.Lock()
+
+def get_chat_client():
+    """Get the process-wide OpenAI client, which keeps its connections pooled across turns"""
+    global _chat_client
+    with _chat_client_lock:
+        if _chat_client is None:
+            _chat_client = openai.OpenAI(
+                base_url=CHAT_API_URL,
+                api_key=CHAT_API_KEY or 'unused',
+                timeout=CHAT_TIMEOUT,
+                max_retries=0
+            )
+        return _chat_client
+
+def create_chat_backend(content_provider, backend=CHAT_BACKEND):
+    """Get the configured chat backend, with keyword replies as the fallback"""
+    keyword_backend = KeywordChatBackend(content_provider)
+    if backend == 'openai':
+        if openai is None:
+            print("Error creating chat backend: the openai package is not installed, using keyword replies")
+            return keyword_backend
+        return OpenAIChatBackend(get_chat_client(), fallback=keyword_backend)
+    return keyword_backend
@@ -1,36 +1,341 @@
+import bisect
+import hashlib
 import json
 import os
+import threading
+import time
+from contextlib import contextmanager
 from datetime import datetime
+from operator import itemgetter
 
-class DataManager:
-    """Manages user data persistence using JSON files"""
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+    import msvcrt
+
+# Directory holding one JSON shard per user
+DATA_DIR = os.getenv('DATA_DIR', 'user_data')
+# Pre-sharding single-file backup, used to seed DATA_LEGACY_USER's shard
+DATA_LEGACY_FILE = os.getenv('DATA_LEGACY_FILE', 'user_data.json')
+DATA_LEGACY_USER = os.getenv('DATA_LEGACY_USER', 'default_user')
+# 'journal' appends each change to a journal next to the snapshot file;
+# 'snapshot' rewrites the whole file on every change
+DATA_STORAGE_MODE = os.getenv('DATA_STORAGE_MODE', 'journal')
+# Journal size in bytes at which it is folded into a new snapshot
+DATA_COMPACT_BYTES = int(os.getenv('DATA_COMPACT_BYTES', '262144'))
+
+# Snapshot key holding the last journal sequence number it includes
+JOURNAL_SEQ_KEY = '_journal_seq'
+
+class UserData(dict):
+    """A user's data document that keeps derived indexes in step with its writes.
+
+    Holds per-date activity counts and the goals ordered by end date. The
+    indexes are built on the first query after loading, and DataManager's
+    record_progress and record_goal keep them current from then on.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._indexed = False
+        self._progress_counts = {}
+        self._goal_index = []  # (end ordinal, position in goals, start ordinal), sorted
+    
+    def set_progress(self, date, category, entry):
+        """Store one day's progress entry for a category"""
+        activities = self.setdefault('progress', {}).setdefault(date, {})
+        if self._indexed and category not in activities:
+            self._progress_counts[date] = self._progress_counts.get(date, 0) + 1
+        activities[category] = entry
+    
+    def add_goal(self, goal):
+        """Append a goal"""
+        goals = self.setdefault('goals', [])
+        goals.append(goal)
+        if self._indexed:
+            bisect.insort(self._goal_index, self._goal_entry(len(goals) - 1, goal))
+    
+    def progress_counts(self):
+        """Number of activities per date"""
+        self._ensure_indexes()
+        return dict(self._progress_counts)
+    
+    def current_goals(self, today):
+        """(position, start ordinal) of goals whose program hasn't ended by `today`, in list order"""
+        self._ensure_indexes()
+        first = bisect.bisect_right(self._goal_index, today.toordinal(), key=itemgetter(0))
+        return sorted((position, start) for _, position, start in self._goal_index[first:])
+    
+    def invalidate_indexes(self):
+        """Drop the indexes after the document was changed directly; they rebuild on the next query"""
+        self._indexed = False
+    
+    @staticmethod
+    def _goal_entry(position, goal):
+        start = datetime.fromisoformat(goal['start_date']).date().toordinal()
+        return (start + goal['program_length'], position, start)
+    
+    def _ensure_indexes(self):
+        """Build the indexes from the document if they aren't current"""
+        if self._indexed:
+            return
+        self._progress_counts = {date: len(activities) for date, activities in self.get('progress', {}).items()}
+        self._goal_index = sorted(self._goal_entry(position, goal) for position, goal in enumerate(self.get('goals', [])))
+        self._indexed = True
+
+@contextmanager
+def file_lock(path):
+    """Hold an exclusive advisory lock on `path` across processes"""
+    with open(path, 'a+b') as f:
+        if fcntl:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        else:
+            f.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    # LK_LOCK gives up after about 10 seconds; keep waiting
+                    time.sleep(0.05)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+            else:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+
+class UserDataShard:
+    """One user's JSON data: a snapshot file plus an append-only journal.
+
+    Each change is appended as one line to `<data_file>.journal` and the
+    journal is periodically compacted into the snapshot. Snapshots are
+    written to a temp file and renamed into place, so a crash never leaves
+    a half-written file; loading replays the journal on top of the snapshot
+    and ignores a torn last line. Every operation holds `<data_file>.lock`,
+    so several server processes can share the shard.
+    """
     
-    def __init__(self, data_file='user_data.json'):
+    def __init__(self, data_file, storage_mode=DATA_STORAGE_MODE, compact_bytes=DATA_COMPACT_BYTES, seed_file=None):
         self.data_file = data_file
+        self.journal_file = f"{data_file}.journal"
+        self.lock_file = f"{data_file}.lock"
+        self.storage_mode = storage_mode
+        self.compact_bytes = compact_bytes
+        self.seed_file = seed_file
+        self._lock = threading.Lock()
+        self._seq = 0
+        self._journal_size = 0
+        self._version = None
+    
+    @contextmanager
+    def locked(self):
+        """Hold the shard's thread and process locks"""
+        with self._lock, file_lock(self.lock_file):
+            yield
+    
+    def load(self):
+        """Load the snapshot and replay the journal on top of it"""
+        with self.locked():
+            return self._load()
+    
+    def save(self, data):
+        """Save data as a new snapshot, replacing the file atomically and resetting the journal"""
+        with self.locked():
+            self._sync()
+            self._write_snapshot(data)
+    
+    def record(self, change, data):
+        """Persist one change; `data` is the full document, used in snapshot mode"""
+        with self.locked():
+            self._sync()
+            if self.storage_mode != 'journal':
+                self._write_snapshot(data)
+                return
+            self._seq += 1
+            line = json.dumps({'seq': self._seq, **change}) + '\n'
+            with open(self.journal_file, 'a') as f:
+                f.write(line)
+            self._journal_size += len(line)
+            self._version = self._file_version()
+            if self._journal_size >= self.compact_bytes:
+                self._write_snapshot(self._load())
     
-    def load_user_data(self):
-        """Load user data from JSON file"""
+    def compact(self):
+        """Fold the journal into a new snapshot"""
+        with self.locked():
+            self._write_snapshot(self._load())
+    
+    def _file_version(self):
+        """Identify the on-disk state, to notice writes from other processes"""
+        versions = []
+        for path in (self.data_file, self.journal_file):
+            try:
+                stat = os.stat(path)
+                versions.append((stat.st_ino, stat.st_mtime_ns, stat.st_size))
+            except FileNotFoundError:
+                versions.append(None)
+        return tuple(versions)
+    
+    def _sync(self):
+        """Refresh the sequence counter if the shard changed since this process last touched it"""
+        if self._version is None or self._version != self._file_version():
+            self._load()
+    
+    def _load(self):
+        """Read the snapshot, replay newer journal records, and sync the sequence counter"""
+        data = {}
+        seeded = False
+        if os.path.exists(self.data_file):
+            with open(self.data_file, 'r') as f:
+                data = json.load(f)
+        elif self.seed_file and os.path.exists(self.seed_file):
+            # Snapshot plus journal of the pre-sharding single-file store
+            data = UserDataShard(self.seed_file)._load()
+            seeded = True
+        seq = data.pop(JOURNAL_SEQ_KEY, 0)
+        journal_size = 0
+        if os.path.exists(self.journal_file):
+            with open(self.journal_file, 'rb+') as f:
+                for line in f:
+                    try:
+                        change = json.loads(line)
+                    except ValueError:
+                        # A crash mid-append leaves a torn last line; drop it so new records follow valid ones
+                        f.truncate(journal_size)
+                        break
+                    journal_size += len(line)
+                    # Records at or below the snapshot's sequence were compacted already
+                    if change['seq'] > seq:
+                        self._apply(data, change)
+                        seq = change['seq']
+        self._seq = seq
+        self._journal_size = journal_size
+        self._version = self._file_version()
+        if seeded:
+            self._write_snapshot(data)
+        return data
+    
+    @staticmethod
+    def _apply(data, change):
+        """Apply one journal record to user data"""
+        *parents, key = change['path']
+        target = data
+        for name in parents:
+            target = target.setdefault(name, {})
+        if change['op'] == 'append':
+            target.setdefault(key, []).append(change['value'])
+        else:
+            target[key] = change['value']
+    
+    def _write_snapshot(self, data):
+        """Publish data as the snapshot via write-to-temp-then-rename, then empty the journal"""
+        temp_file = f"{self.data_file}.tmp"
+        with open(temp_file, 'w') as f:
+            json.dump({**data, JOURNAL_SEQ_KEY: self._seq}, f, indent=2)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_file, self.data_file)
+        # The snapshot now covers every journal record, so a crash before this
+        # truncate only leaves records that the next load skips
+        with open(self.journal_file, 'w'):
+            pass
+        self._journal_size = 0
+        self._version = self._file_version()
+
+class DataManager:
+    """Manages user data persistence using one sharded JSON file per user"""
+    
+    def __init__(self, data_dir=DATA_DIR, legacy_file=DATA_LEGACY_FILE, legacy_user=DATA_LEGACY_USER,
+                 storage_mode=DATA_STORAGE_MODE, compact_bytes=DATA_COMPACT_BYTES):
+        self.data_dir = data_dir
+        self.legacy_file = legacy_file
+        self.legacy_user = legacy_user
+        self.storage_mode = storage_mode
+        self.compact_bytes = compact_bytes
+        self._shards = {}
+        self._shards_lock = threading.Lock()
+    
+    def shard_path(self, user_key):
+        """Path of a user's shard: <data_dir>/<first two hex digits>/<sha1 of the key>.json"""
+        digest = hashlib.sha1(str(user_key).encode('utf-8')).hexdigest()
+        return os.path.join(self.data_dir, digest[:2], f"{digest}.json")
+    
+    def load_user_data(self, user_key):
+        """Load a user's data from their shard"""
         try:
-            if os.path.exists(self.data_file):
-                with open(self.data_file, 'r') as f:
-                    return json.load(f)
-            return {}
+            return UserData(self._shard(user_key).load())
         except Exception as e:
             print(f"Error loading user data: {e}")
-            return {}
+            return UserData()
     
-    def save_user_data(self, data):
-        """Save user data to JSON file"""
+    def save_user_data(self, user_key, data):
+        """Replace a user's data with a new snapshot"""
         try:
-            with open(self.data_file, 'w') as f:
-                json.dump(data, f, indent=2)
+            self._shard(user_key).save(data)
             return True
         except Exception as e:
             print(f"Error saving user data: {e}")
             return False
     
+    def record_progress(self, user_key, user_data, date, category, entry):
+        """Store one day's progress entry for a category in user_data and persist just that change"""
+        if isinstance(user_data, UserData):
+            user_data.set_progress(date, category, entry)
+        else:
+            user_data.setdefault('progress', {}).setdefault(date, {})[category] = entry
+        return self._record(user_key, user_data, {'op': 'set', 'path': ['progress', date, category], 'value': entry})
+    
+    def record_goal(self, user_key, user_data, goal):
+        """Append a goal to user_data and persist just that change"""
+        if isinstance(user_data, UserData):
+            user_data.add_goal(goal)
+        else:
+            user_data.setdefault('goals', []).append(goal)
+        return self._record(user_key, user_data, {'op': 'append', 'path': ['goals'], 'value': goal})
+    
+    def compact(self, user_key):
+        """Fold a user's journal into a new snapshot"""
+        try:
+            self._shard(user_key).compact()
+            return True
+        except Exception as e:
+            print(f"Error compacting user data: {e}")
+            return False
+    
+    def _record(self, user_key, user_data, change):
+        """Persist one change to a user's shard"""
+        try:
+            self._shard(user_key).record(change, user_data)
+            return True
+        except Exception as e:
+            print(f"Error saving user data: {e}")
+            return False
+    
+    def _shard(self, user_key):
+        """Get the shard for a user, creating its directory on first use"""
+        with self._shards_lock:
+            shard = self._shards.get(user_key)
+            if shard is None:
+                data_file = self.shard_path(user_key)
+                os.makedirs(os.path.dirname(data_file), exist_ok=True)
+                shard = UserDataShard(
+                    data_file,
+                    storage_mode=self.storage_mode,
+                    compact_bytes=self.compact_bytes,
+                    # The legacy file held the single pre-sharding user's data
+                    seed_file=self.legacy_file if user_key == self.legacy_user else None
+                )
+                self._shards[user_key] = shard
+            return shard
+    
     def get_progress_summary(self, user_data):
         """Get a summary of user progress"""
+        if isinstance(user_data, UserData):
+            return user_data.progress_counts()
         if 'progress' not in user_data:
             return {}
         
@@ -48,6 +353,17 @@ class DataManager:
         current_goals = []
         today = datetime.now().date()
         
+        if isinstance(user_data, UserData):
+            for position, start in user_data.current_goals(today):
+                goal = user_data['goals'][position]
+                days_elapsed = today.toordinal() - start
+                current_goals.append({
+                    **goal,
+                    'days_remaining': goal['program_length'] - days_elapsed,
+                    'progress_percentage': (days_elapsed / goal['program_length']) * 100
+                })
+            return current_goals
+        
         for goal in user_data['goals']:
             start_date = datetime.fromisoformat(goal['start_date']).date()
             days_elapsed = (today - start_date).days
@@ -60,3 +376,14 @@ class DataManager:
                 })
         
         return current_goals
+
+_data_manager = None
+_data_manager_lock = threading.Lock()
+
+def get_data_manager():
+    """Get the process-wide data manager, so journal state survives Streamlit reruns"""
+    global _data_manager
+    with _data_manager_lock:
+        if _data_manager is None:
+            _data_manager = DataManager()
+        return _data_manager
@@ -1,13 +1,94 @@
+import atexit
+import gzip
+import json
 import os
-from sqlalchemy import create_engine, Column, Integer, String, DateTime, Boolean, Text, ForeignKey
+import queue
+import threading
+import time
+from collections import OrderedDict
+from concurrent import futures
+from sqlalchemy import create_engine, Column, Integer, String, DateTime, Boolean, Text, ForeignKey, Index, and_, event, insert, or_, update
+from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker, relationship
-from datetime import datetime
+from sqlalchemy.orm import sessionmaker, relationship, scoped_session
+from datetime import date, datetime, timezone
+from migrations import run_migrations
 
 # Database configuration
 DATABASE_URL = os.getenv('DATABASE_URL', 'sqlite:///dscpl.db')
-engine = create_engine(DATABASE_URL)
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '5'))
+DB_MAX_OVERFLOW = int(os.getenv('DB_MAX_OVERFLOW', '10'))
+DB_POOL_TIMEOUT = float(os.getenv('DB_POOL_TIMEOUT', '30'))
+DB_POOL_RECYCLE = int(os.getenv('DB_POOL_RECYCLE', '1800'))
+DB_POOL_PRE_PING = os.getenv('DB_POOL_PRE_PING', 'true').lower() in ('1', 'true', 'yes')
+
+# SQLite pragma profiles applied to every new connection. 'performance' lets
+# readers run alongside a writer (WAL) and waits on locks instead of failing
+# with "database is locked"; 'default' leaves SQLite's own settings alone.
+SQLITE_PRAGMA_PROFILES = {
+    'performance': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',  # durable in WAL mode except on power loss
+        'mmap_size': 268435456,  # 256 MiB
+        'cache_size': -65536,  # negative means KiB: 64 MiB
+        'busy_timeout': 5000,  # milliseconds
+        'temp_store': 'MEMORY'
+    },
+    'default': {}
+}
+SQLITE_PRAGMA_PROFILE = os.getenv('SQLITE_PRAGMA_PROFILE', 'performance')
+
+DASHBOARD_CACHE_SIZE = int(os.getenv('DASHBOARD_CACHE_SIZE', '2048'))
+
+# Chat persistence: 'sync' commits each turn before returning, 'group' queues
+# the turn and waits for the shared batch commit, 'async' returns immediately
+# and accepts losing up to CHAT_FLUSH_INTERVAL seconds of messages on a crash
+CHAT_WRITE_MODE = os.getenv('CHAT_WRITE_MODE', 'sync')
+CHAT_FLUSH_INTERVAL = float(os.getenv('CHAT_FLUSH_INTERVAL', '0.05'))
+CHAT_FLUSH_BATCH = int(os.getenv('CHAT_FLUSH_BATCH', '500'))
+
+# Rows fetched per round trip when streaming a user's data export
+EXPORT_CHUNK_SIZE = int(os.getenv('EXPORT_CHUNK_SIZE', '1000'))
+
+def get_engine_options(database_url):
+    """Get connection pool settings for a database URL"""
+    if database_url.startswith('sqlite') and (':memory:' in database_url or database_url.rstrip('/') == 'sqlite:'):
+        # In-memory SQLite lives in a single connection, so there is no pool to tune
+        return {}
+    return {
+        'pool_size': DB_POOL_SIZE,
+        'max_overflow': DB_MAX_OVERFLOW,
+        'pool_timeout': DB_POOL_TIMEOUT,
+        'pool_recycle': DB_POOL_RECYCLE,
+        'pool_pre_ping': DB_POOL_PRE_PING
+    }
+
+def get_sqlite_pragmas(profile=SQLITE_PRAGMA_PROFILE):
+    """Get the pragmas for a profile, with SQLITE_<PRAGMA> environment overrides"""
+    pragmas = dict(SQLITE_PRAGMA_PROFILES[profile])
+    for name in SQLITE_PRAGMA_PROFILES['performance']:
+        override = os.getenv(f"SQLITE_{name.upper()}")
+        if override:
+            pragmas[name] = override
+    return pragmas
+
+def install_sqlite_pragmas(engine, pragmas):
+    """Apply pragmas to each new connection an SQLite engine opens"""
+    if engine.dialect.name != 'sqlite' or not pragmas:
+        return
+    
+    @event.listens_for(engine, "connect")
+    def _apply_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+engine = create_engine(DATABASE_URL, **get_engine_options(DATABASE_URL))
+install_sqlite_pragmas(engine, get_sqlite_pragmas())
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# One session per thread: every Streamlit session runs its script in its own thread
+ScopedSession = scoped_session(SessionLocal)
 Base = declarative_base()
 
 class User(Base):
@@ -38,6 +119,10 @@ class Goal(Base):
     
     # Relationships
     user = relationship("User", back_populates="goals")
+    
+    __table_args__ = (
+        Index("ix_goals_user_is_active", "user_id", "is_active"),
+    )
 
 class Progress(Base):
     __tablename__ = "progress"
@@ -52,6 +137,10 @@ class Progress(Base):
     
     # Relationships
     user = relationship("User", back_populates="progress")
+    
+    __table_args__ = (
+        Index("ix_progress_user_completion_date", "user_id", "completion_date"),
+    )
 
 class ChatMessage(Base):
     __tablename__ = "chat_messages"
@@ -64,16 +153,109 @@ class ChatMessage(Base):
     
     # Relationships
     user = relationship("User", back_populates="chat_messages")
+    
+    __table_args__ = (
+        Index("ix_chat_messages_user_timestamp_id", "user_id", "timestamp", "id"),
+    )
+
+class UserStats(Base):
+    __tablename__ = "user_stats"
+    
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    total_activities = Column(Integer, default=0, nullable=False)
+    total_goals = Column(Integer, default=0, nullable=False)
+    active_goals = Column(Integer, default=0, nullable=False)
+    category_counts = Column(Text, default="{}", nullable=False)  # JSON object of category -> count
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+class Video(Base):
+    __tablename__ = "videos"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    external_id = Column(String(100), unique=True, nullable=False)  # post id in the Socialverse catalog
+    title = Column(String(300), nullable=False, index=True)
+    verse_reference = Column(String(50), index=True)
+    video_url = Column(Text)
+    content_hash = Column(String(40), nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow)
+    
+    # Relationships
+    keywords = relationship("VideoKeyword", back_populates="video", cascade="all, delete-orphan")
+
+class VideoKeyword(Base):
+    __tablename__ = "video_keywords"
+    
+    keyword = Column(String(50), primary_key=True)
+    video_id = Column(Integer, ForeignKey("videos.id"), primary_key=True)
+    
+    # Relationships
+    video = relationship("Video", back_populates="keywords")
+
+class UserQueryCache:
+    """Process-wide LRU cache of per-user query results.
+    
+    Entries are keyed by the user's version counter, which every write for
+    that user bumps, so cached results are reused until the next write and
+    stale versions simply age out of the LRU.
+    """
+    
+    def __init__(self, max_entries=DASHBOARD_CACHE_SIZE):
+        self.max_entries = max_entries
+        self.stats = {'hits': 0, 'misses': 0, 'evictions': 0}
+        self._entries = OrderedDict()
+        self._versions = {}
+        self._lock = threading.Lock()
+    
+    def get_or_compute(self, user_id, key, compute):
+        """Get a cached result for the user's current version, computing it on a miss"""
+        with self._lock:
+            version = self._versions.get(user_id, 0)
+            entry_key = (user_id, version, key)
+            if entry_key in self._entries:
+                self._entries.move_to_end(entry_key)
+                self.stats['hits'] += 1
+                return self._entries[entry_key]
+            self.stats['misses'] += 1
+        
+        value = compute()
+        
+        with self._lock:
+            # Don't store a result that a concurrent write may have made stale
+            if self._versions.get(user_id, 0) == version:
+                self._entries[entry_key] = value
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+                    self.stats['evictions'] += 1
+        return value
+    
+    def invalidate(self, user_id):
+        """Bump the user's version so cached results are no longer used"""
+        with self._lock:
+            self._versions[user_id] = self._versions.get(user_id, 0) + 1
+    
+    def get_stats(self):
+        """Get hit, miss and eviction counters"""
+        with self._lock:
+            return {**self.stats, 'entries': len(self._entries)}
+
+user_query_cache = UserQueryCache()
 
 class DatabaseManager:
     """Manages database operations for the DSCPL app"""
     
-    def __init__(self):
-        self.session = SessionLocal()
+    def __init__(self, session_registry=ScopedSession, query_cache=user_query_cache):
+        self.session_registry = session_registry
+        self.query_cache = query_cache
+    
+    @property
+    def session(self):
+        """Database session for the current thread"""
+        return self.session_registry()
     
     def create_tables(self):
-        """Create all database tables"""
+        """Create all database tables and bring existing ones up to date"""
         Base.metadata.create_all(bind=engine)
+        run_migrations(engine)
     
     def get_or_create_user(self, username="default_user", email=None):
         """Get existing user or create a new one"""
@@ -83,10 +265,14 @@ class DatabaseManager:
             self.session.add(user)
             self.session.commit()
             self.session.refresh(user)
+        # Callers keep the user across script runs, and so across sessions;
+        # detach it so later commits can't expire its loaded attributes
+        self.session.expunge(user)
         return user
     
     def create_goal(self, user_id, category, topic, program_length, start_date):
         """Create a new goal for a user"""
+        self._ensure_user_stats(user_id)
         goal = Goal(
             user_id=user_id,
             category=category,
@@ -95,9 +281,27 @@ class DatabaseManager:
             start_date=start_date
         )
         self.session.add(goal)
+        self._bump_user_stats(user_id, total_goals=1, active_goals=1)
         self.session.commit()
+        self.query_cache.invalidate(user_id)
         return goal
     
+    def complete_goal(self, goal_id):
+        """Mark a goal as no longer active"""
+        goal = self.session.get(Goal, goal_id)
+        if goal is None:
+            return False
+        self._ensure_user_stats(goal.user_id)
+        updated = self.session.query(Goal).filter(
+            Goal.id == goal_id,
+            Goal.is_active == True
+        ).update({'is_active': False}, synchronize_session=False)
+        if updated:
+            self._bump_user_stats(goal.user_id, active_goals=-1)
+        self.session.commit()
+        self.query_cache.invalidate(goal.user_id)
+        return bool(updated)
+    
     def get_user_goals(self, user_id, active_only=True):
         """Get all goals for a user"""
         query = self.session.query(Goal).filter(Goal.user_id == user_id)
@@ -107,6 +311,7 @@ class DatabaseManager:
     
     def save_progress(self, user_id, category, topic, completed=True, notes=None):
         """Save user progress for a completed activity"""
+        self._ensure_user_stats(user_id)
         progress = Progress(
             user_id=user_id,
             category=category,
@@ -115,13 +320,15 @@ class DatabaseManager:
             notes=notes
         )
         self.session.add(progress)
+        self._bump_user_stats(user_id, category_counts={category: 1}, total_activities=1)
         self.session.commit()
+        self.query_cache.invalidate(user_id)
         return progress
     
-    def get_user_progress(self, user_id, days=30):
-        """Get user progress for the last N days"""
+    def get_user_progress(self, user_id, days=30, since=None):
+        """Get user progress for the last N days, or since a given UTC datetime"""
         from datetime import timedelta
-        cutoff_date = datetime.utcnow() - timedelta(days=days)
+        cutoff_date = since if since is not None else datetime.utcnow() - timedelta(days=days)
         return self.session.query(Progress).filter(
             Progress.user_id == user_id,
             Progress.completion_date >= cutoff_date
@@ -138,14 +345,249 @@ class DatabaseManager:
         self.session.commit()
         return chat_message
     
+    def save_chat_messages(self, user_id, messages):
+        """Save several (sender, message_text, timestamp) chat messages in one transaction"""
+        self.session.execute(insert(ChatMessage), [
+            {'user_id': user_id, 'sender': sender, 'message_text': message_text, 'timestamp': timestamp}
+            for sender, message_text, timestamp in messages
+        ])
+        self.session.commit()
+    
+    def save_chat_turn(self, user_id, user_text, ai_text, user_timestamp=None):
+        """Save a user message and the AI reply, using the configured CHAT_WRITE_MODE"""
+        messages = [
+            ('user', user_text, user_timestamp or datetime.utcnow()),
+            ('ai', ai_text, datetime.utcnow())
+        ]
+        if CHAT_WRITE_MODE == 'sync':
+            self.save_chat_messages(user_id, messages)
+            return
+        if CHAT_WRITE_MODE == 'group':
+            # Raises here if the batch holding this turn failed to commit
+            get_chat_write_queue().put(user_id, messages, urgent=True).result()
+        else:
+            get_chat_write_queue().put(user_id, messages)
+    
+    def get_chat_page(self, user_id, limit=50, before=None):
+        """Get up to `limit` chat messages older than the `before` cursor, newest first.
+        
+        Returns the messages in chronological order and the cursor for the
+        next older page, or None when there is nothing older. The seek on
+        (user_id, timestamp, id) costs the same however long the history is.
+        """
+        flush_chat_write_queue()
+        query = self.session.query(ChatMessage).filter(ChatMessage.user_id == user_id)
+        if before is not None:
+            before_timestamp, before_id = before
+            query = query.filter(or_(
+                ChatMessage.timestamp < before_timestamp,
+                and_(ChatMessage.timestamp == before_timestamp, ChatMessage.id < before_id)
+            ))
+        messages = query.order_by(
+            ChatMessage.timestamp.desc(),
+            ChatMessage.id.desc()
+        ).limit(limit + 1).all()
+        
+        has_more = len(messages) > limit
+        messages = messages[:limit]
+        cursor = (messages[-1].timestamp, messages[-1].id) if has_more else None
+        messages.reverse()
+        return messages, cursor
+    
     def get_chat_history(self, user_id, limit=50):
-        """Get chat history for a user"""
-        return self.session.query(ChatMessage).filter(
-            ChatMessage.user_id == user_id
-        ).order_by(ChatMessage.timestamp.asc()).limit(limit).all()
+        """Get the most recent chat history for a user"""
+        messages, _ = self.get_chat_page(user_id, limit=limit)
+        return messages
     
     def get_user_stats(self, user_id):
         """Get comprehensive user statistics"""
+        return self.query_cache.get_or_compute(user_id, 'stats', lambda: self._load_user_stats(user_id))
+    
+    def get_dashboard_data(self, user_id, days=7):
+        """Get stats, active goals and recent progress for the dashboard as plain, cacheable data"""
+        return {
+            'stats': self.get_user_stats(user_id),
+            'goals': self.get_active_goals_data(user_id),
+            'recent_progress': self.get_recent_progress_data(user_id, days)
+        }
+    
+    def get_active_goals_data(self, user_id):
+        """Get a user's active goals as plain dicts, cached until the next write"""
+        return self.query_cache.get_or_compute(
+            user_id, 'active_goals', lambda: [self._goal_to_dict(goal) for goal in self.get_user_goals(user_id)]
+        )
+    
+    def get_recent_progress_data(self, user_id, days=7):
+        """Get a user's progress over the last `days` UTC calendar days, today included, cached until the next write"""
+        # The window starts at a UTC midnight, so it only moves when the UTC date does and that date can key the cache
+        from datetime import timedelta
+        first_day = datetime.utcnow().date() - timedelta(days=days - 1)
+        since = datetime.combine(first_day, datetime.min.time())
+        return self.query_cache.get_or_compute(
+            user_id, ('recent_progress', days, first_day),
+            lambda: [self._progress_to_dict(progress) for progress in self.get_user_progress(user_id, since=since)]
+        )
+    
+    def _load_user_stats(self, user_id):
+        """Read a user's stats row"""
+        stats = self.session.get(UserStats, user_id)
+        if stats is None:
+            self._ensure_user_stats(user_id)
+            stats = self.session.get(UserStats, user_id)
+        
+        return {
+            'total_activities': stats.total_activities,
+            'total_goals': stats.total_goals,
+            'active_goals': stats.active_goals,
+            'category_breakdown': json.loads(stats.category_counts or '{}')
+        }
+    
+    def rebuild_user_stats(self, user_id=None):
+        """Recompute stored statistics from the raw tables for one user, or for every user"""
+        if user_id is None:
+            user_ids = [row.id for row in self.session.query(User.id)]
+        else:
+            user_ids = [user_id]
+        for uid in user_ids:
+            self.session.merge(self._compute_user_stats(uid))
+        self.session.commit()
+        for uid in user_ids:
+            self.query_cache.invalidate(uid)
+        return len(user_ids)
+    
+    def sync_user_data(self, user_id, user_data):
+        """Bulk upsert the progress and goals of a session/legacy JSON document in one transaction.
+        
+        Rows are matched on their natural key (category, topic, day), so
+        re-running a sync inserts nothing. Returns inserted/updated/unchanged
+        counts for 'progress' and 'goals'.
+        """
+        progress_rows = []
+        for day, activities in user_data.get('progress', {}).items():
+            for category, activity in activities.items():
+                timestamp = activity.get('timestamp')
+                # JSON timestamps are local time; the database stores UTC
+                completion_date = (
+                    datetime.fromisoformat(timestamp).astimezone(timezone.utc).replace(tzinfo=None)
+                    if timestamp else datetime.fromisoformat(day)
+                )
+                progress_rows.append({
+                    'category': category,
+                    'topic': activity['topic'],
+                    'completed': activity.get('completed', True),
+                    'completion_date': completion_date,
+                    'notes': activity.get('notes')
+                })
+        goal_rows = [
+            {
+                'category': goal['category'],
+                'topic': goal['topic'],
+                'program_length': goal['program_length'],
+                'start_date': datetime.fromisoformat(goal['start_date'])
+            }
+            for goal in user_data.get('goals', [])
+        ]
+        
+        self._ensure_user_stats(user_id)
+        progress_counts, new_progress = self._sync_rows(
+            user_id, Progress, 'completion_date', ('completed', 'notes'), progress_rows
+        )
+        goal_counts, new_goals = self._sync_rows(user_id, Goal, 'start_date', ('program_length',), goal_rows)
+        counts = {'progress': progress_counts, 'goals': goal_counts}
+        
+        category_counts = {}
+        for row in new_progress:
+            category_counts[row['category']] = category_counts.get(row['category'], 0) + 1
+        if new_progress or new_goals:
+            self._bump_user_stats(
+                user_id,
+                category_counts=category_counts,
+                total_activities=len(new_progress),
+                total_goals=len(new_goals),
+                active_goals=len(new_goals)
+            )
+        self.session.commit()
+        if any(count['inserted'] or count['updated'] for count in counts.values()):
+            self.query_cache.invalidate(user_id)
+        return counts
+    
+    def _sync_rows(self, user_id, model, date_column, value_columns, rows):
+        """Insert or update rows keyed on (user, category, topic, day of date_column) with one SELECT and executemany.
+        
+        Returns the inserted/updated/unchanged counts and the inserted rows.
+        """
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        if not rows:
+            return counts, []
+        
+        # Later duplicates of a key in the input win, as they would in the JSON document
+        incoming = {(row['category'], row['topic'], row[date_column].date()): row for row in rows}
+        dates = [row[date_column] for row in incoming.values()]
+        day_start = datetime.combine(min(dates).date(), datetime.min.time())
+        day_end = datetime.combine(max(dates).date(), datetime.max.time())
+        columns = [getattr(model, name) for name in ('id', 'category', 'topic', date_column) + value_columns]
+        existing = {}
+        for row in self.session.query(*columns).filter(
+            model.user_id == user_id,
+            getattr(model, date_column).between(day_start, day_end)
+        ).order_by(model.id):
+            # Keep the oldest row when earlier, non-idempotent saves left duplicates
+            existing.setdefault((row.category, row.topic, getattr(row, date_column).date()), row)
+        
+        inserts, updates = [], []
+        for key, row in incoming.items():
+            current = existing.get(key)
+            if current is None:
+                inserts.append({'user_id': user_id, **row})
+            elif any(getattr(current, name) != row[name] for name in value_columns):
+                updates.append({'id': current.id, **{name: row[name] for name in value_columns}})
+            else:
+                counts['unchanged'] += 1
+        if inserts:
+            self.session.execute(insert(model), inserts)
+        if updates:
+            self.session.execute(update(model), updates)
+        counts['inserted'] = len(inserts)
+        counts['updated'] = len(updates)
+        return counts, inserts
+    
+    def clear_user_data(self, user_id):
+        """Delete a user's chat messages, progress and goals"""
+        self.session.query(ChatMessage).filter_by(user_id=user_id).delete()
+        self.session.query(Progress).filter_by(user_id=user_id).delete()
+        self.session.query(Goal).filter_by(user_id=user_id).delete()
+        self.session.merge(UserStats(
+            user_id=user_id,
+            total_activities=0,
+            total_goals=0,
+            active_goals=0,
+            category_counts='{}'
+        ))
+        self.session.commit()
+        self.query_cache.invalidate(user_id)
+    
+    @staticmethod
+    def _goal_to_dict(goal):
+        return {
+            'id': goal.id,
+            'category': goal.category,
+            'topic': goal.topic,
+            'program_length': goal.program_length,
+            'start_date': goal.start_date,
+            'is_active': goal.is_active
+        }
+    
+    @staticmethod
+    def _progress_to_dict(progress):
+        return {
+            'category': progress.category,
+            'topic': progress.topic,
+            'completed': progress.completed,
+            'completion_date': progress.completion_date
+        }
+    
+    def _compute_user_stats(self, user_id):
+        """Compute a user's statistics from the raw progress and goal tables"""
         total_activities = self.session.query(Progress).filter(Progress.user_id == user_id).count()
         total_goals = self.session.query(Goal).filter(Goal.user_id == user_id).count()
         active_goals = self.session.query(Goal).filter(
@@ -160,18 +602,193 @@ class DatabaseManager:
             func.count(Progress.id).label('count')
         ).filter(Progress.user_id == user_id).group_by(Progress.category).all()
         
-        return {
-            'total_activities': total_activities,
-            'total_goals': total_goals,
-            'active_goals': active_goals,
-            'category_breakdown': {category: count for category, count in category_stats}
+        return UserStats(
+            user_id=user_id,
+            total_activities=total_activities,
+            total_goals=total_goals,
+            active_goals=active_goals,
+            category_counts=json.dumps({category: count for category, count in category_stats})
+        )
+    
+    def _ensure_user_stats(self, user_id):
+        """Create a user's stats row from the raw tables if it doesn't exist yet"""
+        if self.session.get(UserStats, user_id) is not None:
+            return
+        self.session.add(self._compute_user_stats(user_id))
+        try:
+            self.session.commit()
+        except IntegrityError:
+            # Another session created it first
+            self.session.rollback()
+    
+    def _bump_user_stats(self, user_id, category_counts=None, **deltas):
+        """Apply counter deltas to a user's stats row inside the current transaction"""
+        # The UPDATE takes the row (PostgreSQL) or database (SQLite) write lock
+        # first, so the JSON read-modify-write below can't lose a concurrent update
+        if deltas:
+            self.session.query(UserStats).filter(UserStats.user_id == user_id).update(
+                {getattr(UserStats, name): getattr(UserStats, name) + delta for name, delta in deltas.items()},
+                synchronize_session=False
+            )
+        if category_counts:
+            stats = self.session.get(UserStats, user_id, populate_existing=True)
+            counts = json.loads(stats.category_counts or '{}')
+            for category, delta in category_counts.items():
+                counts[category] = counts.get(category, 0) + delta
+            stats.category_counts = json.dumps(counts)
+    
+    def iter_user_export(self, user_id, chunk_size=EXPORT_CHUNK_SIZE):
+        """Yield a user's profile, goals, progress and chat messages as one JSON-ready record per row.
+        
+        Each table is streamed in chunks of `chunk_size` rows (a server-side
+        cursor on PostgreSQL) as plain column tuples, so memory stays flat
+        however long the user's history is.
+        """
+        user = self.session.get(User, user_id)
+        if user is None:
+            return
+        yield {
+            'type': 'user',
+            'id': user.id,
+            'username': user.username,
+            'email': user.email,
+            'created_at': user.created_at
         }
+        exports = [
+            ('goal', Goal, [Goal.category, Goal.topic, Goal.program_length, Goal.start_date,
+                            Goal.end_date, Goal.is_active, Goal.created_at]),
+            ('progress', Progress, [Progress.category, Progress.topic, Progress.completed,
+                                    Progress.completion_date, Progress.notes]),
+            ('chat_message', ChatMessage, [ChatMessage.sender, ChatMessage.message_text.label('message'),
+                                           ChatMessage.timestamp])
+        ]
+        for record_type, model, columns in exports:
+            rows = self.session.query(*columns).filter(model.user_id == user_id).order_by(model.id).yield_per(chunk_size)
+            for row in rows:
+                record = {'type': record_type}
+                record.update(row._mapping)
+                yield record
+    
+    def write_user_export(self, user_id, fileobj, compress=False, chunk_size=EXPORT_CHUNK_SIZE):
+        """Stream a user's data export as NDJSON (gzip-compressed if `compress`) to a binary file, and return the record count"""
+        flush_chat_write_queue()
+        output = gzip.GzipFile(fileobj=fileobj, mode='wb') if compress else fileobj
+        count = 0
+        try:
+            for record in self.iter_user_export(user_id, chunk_size):
+                output.write(json.dumps(record, default=_json_default).encode('utf-8') + b'\n')
+                count += 1
+        finally:
+            if compress:
+                output.close()
+            # Release the streaming cursor even if the consumer stopped early
+            self.session.rollback()
+        return count
     
     def close(self):
-        """Close database session"""
-        self.session.close()
+        """Close the current thread's database session and return its connection to the pool"""
+        self.session_registry.remove()
+
+def _json_default(value):
+    """Serialize datetimes in exported records as ISO 8601 strings"""
+    if isinstance(value, (date, datetime)):
+        return value.isoformat()
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+class ChatWriteQueue:
+    """Write-behind queue that persists chat messages in batches off the request thread"""
+    
+    def __init__(self, session_factory=SessionLocal, flush_interval=CHAT_FLUSH_INTERVAL, max_batch=CHAT_FLUSH_BATCH):
+        self.session_factory = session_factory
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.stats = {'messages_written': 0, 'commits': 0, 'errors': 0}
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="chat-write-queue", daemon=True)
+        self._thread.start()
+    
+    def put(self, user_id, messages, urgent=False):
+        """Queue (sender, message_text, timestamp) messages; the returned future resolves once they are committed.
+        
+        Urgent messages are written as soon as the writer is free, without
+        waiting up to flush_interval for more messages to share the commit.
+        """
+        written = futures.Future()
+        rows = [
+            {'user_id': user_id, 'sender': sender, 'message_text': message_text, 'timestamp': timestamp}
+            for sender, message_text, timestamp in messages
+        ]
+        self._queue.put((rows, written, urgent))
+        return written
+    
+    def flush(self, timeout=None):
+        """Wait until everything queued so far has been written or has failed; returns False on timeout"""
+        done, _ = futures.wait([self.put(None, [], urgent=True)], timeout)
+        return bool(done)
+    
+    def _run(self):
+        while True:
+            batch = [self._queue.get()]
+            # Take everything that queued up during the previous commit, then
+            # linger briefly for more unless someone is waiting on this batch
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.max_batch:
+                try:
+                    batch.append(self._queue.get_nowait())
+                    continue
+                except queue.Empty:
+                    pass
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or any(urgent for _, _, urgent in batch):
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write(batch)
+    
+    def _write(self, batch):
+        rows = [row for batch_rows, _, _ in batch for row in batch_rows]
+        try:
+            if rows:
+                with self.session_factory() as session:
+                    session.execute(insert(ChatMessage), rows)
+                    session.commit()
+                self.stats['messages_written'] += len(rows)
+                self.stats['commits'] += 1
+        except Exception as e:
+            self.stats['errors'] += 1
+            print(f"Error writing chat messages: {e}")
+            # Every message of the batch was lost, so each waiting caller gets the error
+            for _, written, _ in batch:
+                written.set_exception(e)
+        else:
+            for _, written, _ in batch:
+                written.set_result(None)
+
+_chat_write_queue = None
+_chat_write_queue_lock = threading.Lock()
+
+def get_chat_write_queue():
+    """Get the process-wide chat write queue, starting it on first use"""
+    global _chat_write_queue
+    with _chat_write_queue_lock:
+        if _chat_write_queue is None:
+            _chat_write_queue = ChatWriteQueue()
+        return _chat_write_queue
+
+@atexit.register
+def flush_chat_write_queue(timeout=5):
+    """Write any queued chat messages"""
+    if _chat_write_queue is not None:
+        _chat_write_queue.flush(timeout)
+
+_db_manager = None
 
 # Initialize database manager
 def get_db_manager():
-    """Get a database manager instance"""
-    return DatabaseManager()
\ No newline at end of file
+    """Get the process-wide database manager"""
+    global _db_manager
+    if _db_manager is None:
+        _db_manager = DatabaseManager()
+    return _db_manager
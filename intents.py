@@ -0,0 +1,94 @@
+import re
+
+# Chat intents in priority order: when a message matches several, the first
+# listed wins. Keywords match whole words, case-insensitively; a trailing *
+# matches any word starting with the stem, and multi-word phrases match
+# across any run of whitespace.
+INTENTS = [
+    ('fear', ['afraid', 'scared', 'fear*', 'terrified', 'frightened']),
+    ('sadness', ['sad', 'sadness', 'depressed', 'depression', 'down', 'hopeless', 'despair*', 'empty']),
+    ('stress', ['stress*', 'worried', 'worry', 'worries', 'anxious', 'anxiety', 'overwhelm*', 'panic*']),
+    ('gratitude', ['thank*', 'grateful', 'blessed', 'prais*', 'amazing', 'wonderful']),
+    ('prayer', ['pray*']),
+    ('scripture', ['bible*', 'scripture*', 'verse*', 'word', 'words']),
+    ('temptation', ['tempt*', 'struggl*', 'addict*', 'sin', 'sins', 'sinful', 'sinned', 'sinning']),
+    ('loneliness', ['lonely', 'loneliness', 'alone', 'isolated', 'abandoned']),
+    ('anger', ['angry', 'anger', 'mad', 'frustrat*', 'furious']),
+    ('purpose', ['purpose*', 'calling', 'direction', 'lost', 'confused']),
+    ('greeting', ['hello', 'hi', 'hey', 'good morning', 'good evening']),
+    ('help', ['help*', 'support*', 'advice', 'guidance']),
+]
+
+def build_trie_pattern(keywords):
+    """Regex matching any of the keywords, factored into a trie so each position branches on one character.
+
+    Keywords ending in * also match any word characters after the stem, and
+    spaces match any run of whitespace.
+    """
+    root = {}
+    for keyword in keywords:
+        node = root
+        for unit in keyword.rstrip('*'):
+            node = node.setdefault(r'\s+' if unit == ' ' else re.escape(unit), {})
+        # A stem accepts any suffix, which also covers the bare word
+        if node.get('') != 'stem':
+            node[''] = 'stem' if keyword.endswith('*') else 'word'
+
+    def emit(node):
+        alternatives = [unit + emit(child) for unit, child in sorted(node.items()) if unit]
+        # Ending here is tried last, so longer keywords are preferred
+        if node.get('') == 'stem':
+            alternatives.append(r'\w*')
+        elif node.get('') == 'word':
+            alternatives.append('')
+        if len(alternatives) == 1:
+            return alternatives[0]
+        return f"(?:{'|'.join(alternatives)})"
+
+    return emit(root)
+
+class IntentMatcher:
+    """Classifies text into the highest-priority intent in one regex pass.
+
+    Every keyword of every intent is folded into one trie-shaped regex over
+    lowercased text, so a message is scanned once however many keywords
+    there are, and \\b boundaries stop 'hi' from matching inside 'this'.
+    Each match is mapped back to its intent with a dict lookup.
+    """
+
+    def __init__(self, intents=INTENTS):
+        self.intents = [name for name, _ in intents]
+        self.words = {}
+        self.stems = {}
+        for index, (_, keywords) in enumerate(intents):
+            for keyword in keywords:
+                table = self.stems if keyword.endswith('*') else self.words
+                table.setdefault(keyword.rstrip('*'), index)
+        self.stem_lengths = sorted({len(stem) for stem in self.stems}, reverse=True)
+        all_keywords = [keyword for _, keywords in intents for keyword in keywords]
+        self.pattern = re.compile(rf"\b{build_trie_pattern(all_keywords)}\b")
+
+    def classify(self, text):
+        """Get the highest-priority intent mentioned in text, or None"""
+        best = None
+        for index in self._scan(text):
+            if best is None or index < best:
+                best = index
+                if best == 0:
+                    break
+        return self.intents[best] if best is not None else None
+
+    def matches(self, text):
+        """Get every intent mentioned in text, in priority order"""
+        return [self.intents[index] for index in sorted(set(self._scan(text)))]
+
+    def _scan(self, text):
+        """Yield the intent index of each keyword match in text"""
+        for match in self.pattern.finditer(text.lower()):
+            token = ' '.join(match.group().split())
+            candidates = [self.words[token]] if token in self.words else []
+            candidates += [self.stems[token[:length]] for length in self.stem_lengths if token[:length] in self.stems]
+            yield min(candidates)
+
+# Built once per process
+intent_matcher = IntentMatcher()
@@ -0,0 +1,104 @@
+"""Maintenance commands for the Spirit AI database.
+
+    python manage.py migrate
+    python manage.py rebuild-stats [--user-id ID]
+    python manage.py export --user-id ID [--output FILE]
+    python manage.py import-json [--file user_data.json] [--username NAME]
+    python manage.py build-scripture-index
+    python manage.py build-semantic-index
+"""
+import argparse
+import json
+import sys
+from database import Base, engine, get_db_manager
+from migrations import MIGRATIONS, get_applied_versions, run_migrations
+from scripture import get_scripture_index
+from semantic import get_semantic_index
+
+def migrate(args):
+    """Create missing tables and apply pending schema migrations"""
+    Base.metadata.create_all(bind=engine)
+    newly_applied = run_migrations(engine)
+    applied = get_applied_versions(engine)
+    for version, description, _ in MIGRATIONS:
+        status = "applied now" if version in newly_applied else ("applied" if version in applied else "pending")
+        print(f"{version:04d}  {status:<12} {description}")
+
+def rebuild_stats(args):
+    """Recompute the user_stats table from the raw progress and goal tables"""
+    db_manager = get_db_manager()
+    try:
+        rebuilt = db_manager.rebuild_user_stats(args.user_id)
+    finally:
+        db_manager.close()
+    print(f"Rebuilt statistics for {rebuilt} user(s)")
+
+def export(args):
+    """Stream a user's full history as NDJSON, gzip-compressed when the output ends in .gz"""
+    db_manager = get_db_manager()
+    try:
+        if args.output == "-":
+            count = db_manager.write_user_export(args.user_id, sys.stdout.buffer)
+        else:
+            with open(args.output, "wb") as output:
+                count = db_manager.write_user_export(args.user_id, output, compress=args.output.endswith(".gz"))
+    finally:
+        db_manager.close()
+    print(f"Exported {count} record(s)", file=sys.stderr)
+
+def import_json(args):
+    """Upsert progress and goals from a legacy user_data.json file; safe to re-run"""
+    with open(args.file) as f:
+        user_data = json.load(f)
+    db_manager = get_db_manager()
+    try:
+        user_id = db_manager.get_or_create_user(args.username).id
+        counts = db_manager.sync_user_data(user_id, user_data)
+    finally:
+        db_manager.close()
+    for table, count in counts.items():
+        print(f"{table:<10} {count['inserted']} inserted, {count['updated']} updated, {count['unchanged']} unchanged")
+
+def build_scripture_index(args):
+    """Build the full-text scripture search index from the corpus file"""
+    index = get_scripture_index()
+    count = index.build()
+    print(f"Indexed {count} verse(s) from {index.corpus_path} into {index.index_path}")
+
+def build_semantic_index(args):
+    """Embed verses, prayers and chat replies into the semantic search index (needs NumPy)"""
+    index = get_semantic_index()
+    if index is None:
+        sys.exit("NumPy is not installed; install it to build the semantic index")
+    count = index.build()
+    print(f"Embedded {count} item(s) into {index.index_dir}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Spirit AI maintenance commands")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    commands.add_parser("migrate", help=migrate.__doc__).set_defaults(func=migrate)
+
+    rebuild_parser = commands.add_parser("rebuild-stats", help=rebuild_stats.__doc__)
+    rebuild_parser.add_argument("--user-id", type=int, help="only rebuild this user's statistics")
+    rebuild_parser.set_defaults(func=rebuild_stats)
+
+    export_parser = commands.add_parser("export", help=export.__doc__)
+    export_parser.add_argument("--user-id", type=int, required=True, help="user whose data to export")
+    export_parser.add_argument("--output", default="-", help="file to write, or - for stdout (default)")
+    export_parser.set_defaults(func=export)
+
+    import_parser = commands.add_parser("import-json", help=import_json.__doc__)
+    import_parser.add_argument("--file", default="user_data.json", help="JSON file to import (default user_data.json)")
+    import_parser.add_argument("--username", default="default_user", help="user to import into (default default_user)")
+    import_parser.set_defaults(func=import_json)
+
+    commands.add_parser("build-scripture-index", help=build_scripture_index.__doc__).set_defaults(func=build_scripture_index)
+
+    commands.add_parser("build-semantic-index", help=build_semantic_index.__doc__).set_defaults(func=build_semantic_index)
+
+    args = parser.parse_args()
+    args.func(args)
+
+if __name__ == "__main__":
+    main()
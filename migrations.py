@@ -0,0 +1,67 @@
+from datetime import datetime
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, insert, select, text
+from sqlalchemy.exc import IntegrityError
+
+# Applied migration versions are recorded here
+metadata = MetaData()
+schema_migrations = Table(
+    "schema_migrations",
+    metadata,
+    Column("version", Integer, primary_key=True),
+    Column("description", String(200), nullable=False),
+    Column("applied_at", DateTime, default=datetime.utcnow),
+)
+
+def migration_001(connection):
+    """Composite indexes for the per-user queries in DatabaseManager"""
+    # CREATE INDEX IF NOT EXISTS works on both SQLite and PostgreSQL, and is a
+    # no-op on databases where create_all() already built the indexes
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_progress_user_completion_date ON progress (user_id, completion_date)"
+    ))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_chat_messages_user_timestamp ON chat_messages (user_id, timestamp)"
+    ))
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_goals_user_is_active ON goals (user_id, is_active)"
+    ))
+
+def migration_002(connection):
+    """Add id to the chat history index so keyset pages seek on (user_id, timestamp, id)"""
+    connection.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_chat_messages_user_timestamp_id ON chat_messages (user_id, timestamp, id)"
+    ))
+    connection.execute(text("DROP INDEX IF EXISTS ix_chat_messages_user_timestamp"))
+
+# Versioned migrations, applied in order; never renumber or edit a released one
+MIGRATIONS = [
+    (1, "Composite indexes on progress, chat_messages and goals", migration_001),
+    (2, "Keyset index on chat_messages (user_id, timestamp, id)", migration_002),
+]
+
+def get_applied_versions(engine):
+    """Get the set of migration versions already applied"""
+    metadata.create_all(bind=engine)
+    with engine.connect() as connection:
+        return {row.version for row in connection.execute(select(schema_migrations.c.version))}
+
+def run_migrations(engine):
+    """Apply pending migrations, each in its own transaction, and return their versions"""
+    applied = get_applied_versions(engine)
+    newly_applied = []
+    for version, description, migrate in MIGRATIONS:
+        if version in applied:
+            continue
+        try:
+            with engine.begin() as connection:
+                migrate(connection)
+                connection.execute(insert(schema_migrations).values(
+                    version=version,
+                    description=description,
+                    applied_at=datetime.utcnow()
+                ))
+        except IntegrityError:
+            # Another process applied this migration at the same time
+            continue
+        newly_applied.append(version)
+    return newly_applied
@@ -0,0 +1,122 @@
+import json
+import os
+import re
+import sqlite3
+import threading
+
+# Scripture corpus and the SQLite FTS5 index built from it
+SCRIPTURE_CORPUS = os.getenv('SCRIPTURE_CORPUS', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'content_data', 'scripture.json'))
+SCRIPTURE_INDEX = os.getenv('SCRIPTURE_INDEX', 'scripture_index.db')
+
+# Words too common to help rank verses for a topic
+QUERY_STOPWORDS = {'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'how', 'i', 'in', 'is', 'it',
+                   'me', 'my', 'of', 'on', 'or', 'so', 'that', 'the', 'to', 'with', 'when', 'what', 'you', 'your'}
+
+class ScriptureIndex:
+    """BM25-ranked full-text search over a scripture corpus, backed by an SQLite FTS5 file.
+
+    The index is built once from the corpus (`python manage.py build-scripture-index`,
+    or on first search) and reused across restarts; it is only rebuilt when
+    the corpus file changes.
+    """
+
+    def __init__(self, index_path=SCRIPTURE_INDEX, corpus_path=SCRIPTURE_CORPUS):
+        self.index_path = index_path
+        self.corpus_path = corpus_path
+        self._local = threading.local()
+        self._build_lock = threading.Lock()
+        self._ready = False
+
+    def build(self):
+        """Tokenize the corpus into a new index file and swap it in atomically; returns the verse count"""
+        with open(self.corpus_path, encoding='utf-8') as f:
+            verses = json.load(f)['verses']
+        temp_path = f"{self.index_path}.{os.getpid()}.tmp"
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        connection = sqlite3.connect(temp_path)
+        try:
+            with connection:
+                # reference is stored for display only; topics are curated tags ranked above the verse text
+                connection.execute(
+                    "CREATE VIRTUAL TABLE verses USING fts5(reference UNINDEXED, text, topics, tokenize='porter unicode61')"
+                )
+                connection.executemany(
+                    "INSERT INTO verses (reference, text, topics) VALUES (?, ?, ?)",
+                    ((verse['reference'], verse['text'], verse.get('topics', '')) for verse in verses)
+                )
+                connection.execute("INSERT INTO verses (verses) VALUES ('optimize')")
+                connection.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+                connection.execute("INSERT INTO meta VALUES ('corpus', ?)", (self._corpus_fingerprint(),))
+        finally:
+            connection.close()
+        os.replace(temp_path, self.index_path)
+        self._local = threading.local()
+        self._ready = True
+        return len(verses)
+
+    def is_current(self):
+        """Check that the index file exists and was built from the current corpus"""
+        if not os.path.exists(self.index_path):
+            return False
+        try:
+            connection = sqlite3.connect(f"file:{self.index_path}?mode=ro", uri=True)
+            try:
+                row = connection.execute("SELECT value FROM meta WHERE key = 'corpus'").fetchone()
+            finally:
+                connection.close()
+        except sqlite3.Error:
+            return False
+        return row is not None and row[0] == self._corpus_fingerprint()
+
+    def search(self, query, limit=5):
+        """Get up to `limit` verses ranked by BM25 relevance to free text, best first"""
+        terms = [term for term in re.findall(r"\w+", query.lower()) if term not in QUERY_STOPWORDS]
+        if not terms:
+            return []
+        # Quoted terms are run through the porter tokenizer, so 'worrying' finds 'worry'
+        match = ' OR '.join(f'"{term}"' for term in terms)
+        try:
+            rows = self._connection().execute(
+                "SELECT reference, text, bm25(verses, 0.0, 1.0, 2.0) AS score FROM verses "
+                "WHERE verses MATCH ? ORDER BY score LIMIT ?",
+                (match, limit)
+            ).fetchall()
+        except (sqlite3.Error, OSError) as e:
+            print(f"Error searching scripture index: {e}")
+            return []
+        return [{'reference': reference, 'verse': text, 'score': -score} for reference, text, score in rows]
+
+    def best_match(self, query):
+        """Get the most relevant verse for free text, or None"""
+        results = self.search(query, limit=1)
+        return results[0] if results else None
+
+    def _corpus_fingerprint(self):
+        stat = os.stat(self.corpus_path)
+        return f"{stat.st_size}:{stat.st_mtime_ns}"
+
+    def _connection(self):
+        """Read-only connection for the current thread, building the index first if needed"""
+        if not self._ready:
+            with self._build_lock:
+                if not self._ready:
+                    if not self.is_current():
+                        self.build()
+                    self._ready = True
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(f"file:{self.index_path}?mode=ro", uri=True)
+            self._local.connection = connection
+        return connection
+
+_scripture_index = None
+_scripture_index_lock = threading.Lock()
+
+def get_scripture_index():
+    """Get the process-wide scripture index"""
+    global _scripture_index
+    with _scripture_index_lock:
+        if _scripture_index is None:
+            _scripture_index = ScriptureIndex()
+        return _scripture_index
@@ -0,0 +1,287 @@
+import json
+import math
+import os
+import re
+import shutil
+import threading
+import time
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+from content import get_content_store
+from scripture import SCRIPTURE_CORPUS
+
+# On-disk embedding index; each build gets its own subdirectory and CURRENT names the live one
+SEMANTIC_INDEX_DIR = os.getenv('SEMANTIC_INDEX_DIR', 'semantic_index')
+# Optional locally stored sentence-transformers model; TF-IDF/SVD is used otherwise
+SEMANTIC_MODEL = os.getenv('SEMANTIC_MODEL', '')
+# Dimensions kept by the TF-IDF/SVD encoder
+SEMANTIC_DIM = int(os.getenv('SEMANTIC_DIM', '64'))
+# Use embedding matches in ContentProvider when keyword matching finds nothing
+SEMANTIC_MATCHING = os.getenv('SEMANTIC_MATCHING', 'false').lower() in ('1', 'true', 'yes')
+# Lowest cosine similarity accepted as a match
+SEMANTIC_MIN_SCORE = float(os.getenv('SEMANTIC_MIN_SCORE', '0.2'))
+
+TOKEN_PATTERN = re.compile(r"[a-z]+")
+STOPWORDS = {'a', 'an', 'and', 'are', 'as', 'at', 'be', 'but', 'by', 'for', 'from', 'had', 'has', 'have', 'he',
+             'her', 'him', 'his', 'i', 'if', 'in', 'is', 'it', 'me', 'my', 'not', 'of', 'on', 'or', 'so', 'that',
+             'the', 'their', 'them', 'they', 'this', 'to', 'was', 'we', 'were', 'what', 'when', 'which', 'who',
+             'will', 'with', 'you', 'your', 'thee', 'thou', 'thy', 'ye', 'unto', 'shall', 'hath', 'doth'}
+SUFFIXES = ('ingly', 'edly', 'ness', 'ing', 'ies', 'ied', 'ed', 'es', 'ly', 's')
+
+def tokenize(text):
+    """Lowercase words without stopwords, with common suffixes stripped"""
+    tokens = []
+    for word in TOKEN_PATTERN.findall(text.lower()):
+        if word in STOPWORDS:
+            continue
+        for suffix in SUFFIXES:
+            if word.endswith(suffix) and len(word) - len(suffix) >= 3:
+                word = word[:-len(suffix)]
+                break
+        tokens.append(word)
+    return tokens
+
+class TfidfSvdEncoder:
+    """Embeds text as a TF-IDF vector projected onto the top singular vectors of the corpus (LSA)"""
+
+    name = 'tfidf-svd'
+
+    def __init__(self, vocabulary, idf, components):
+        self.vocabulary = vocabulary
+        self.idf = idf
+        self.components = components
+
+    @classmethod
+    def fit(cls, texts, dim=SEMANTIC_DIM):
+        """Learn the vocabulary, IDF weights and SVD projection from a corpus"""
+        documents = [tokenize(text) for text in texts]
+        vocabulary = {}
+        for tokens in documents:
+            for token in tokens:
+                vocabulary.setdefault(token, len(vocabulary))
+        document_frequency = np.zeros(len(vocabulary), dtype=np.float32)
+        for tokens in documents:
+            document_frequency[[vocabulary[token] for token in set(tokens)]] += 1
+        idf = (np.log((1 + len(documents)) / (1 + document_frequency)) + 1).astype(np.float32)
+        encoder = cls(vocabulary, idf, None)
+        matrix = encoder._tfidf(documents)
+        _, _, vt = np.linalg.svd(matrix, full_matrices=False)
+        encoder.components = np.ascontiguousarray(vt[:min(dim, vt.shape[0])].T, dtype=np.float32)
+        return encoder
+
+    @classmethod
+    def load(cls, path):
+        with open(os.path.join(path, 'vocabulary.json')) as f:
+            vocabulary = json.load(f)
+        return cls(vocabulary, np.load(os.path.join(path, 'idf.npy')), np.load(os.path.join(path, 'components.npy')))
+
+    def save(self, path):
+        with open(os.path.join(path, 'vocabulary.json'), 'w') as f:
+            json.dump(self.vocabulary, f)
+        np.save(os.path.join(path, 'idf.npy'), self.idf)
+        np.save(os.path.join(path, 'components.npy'), self.components)
+
+    def encode(self, texts):
+        """Unit-length embeddings for a batch of texts, one row each"""
+        return normalize_rows(self._tfidf([tokenize(text) for text in texts]) @ self.components)
+
+    def _tfidf(self, documents):
+        matrix = np.zeros((len(documents), len(self.vocabulary)), dtype=np.float32)
+        for row, tokens in enumerate(documents):
+            counts = {}
+            for token in tokens:
+                column = self.vocabulary.get(token)
+                if column is not None:
+                    counts[column] = counts.get(column, 0) + 1
+            for column, count in counts.items():
+                matrix[row, column] = 1 + math.log(count)
+        return normalize_rows(matrix * self.idf)
+
+class ModelEncoder:
+    """Embeds text with a locally stored sentence-transformers model on the CPU"""
+
+    name = 'model'
+
+    def __init__(self, model_path):
+        from sentence_transformers import SentenceTransformer
+        self.model = SentenceTransformer(model_path, device='cpu')
+
+    def save(self, path):
+        """The model lives at SEMANTIC_MODEL, so there is nothing to save"""
+
+    def encode(self, texts):
+        """Unit-length embeddings for a batch of texts, one row each"""
+        return self.model.encode(list(texts), normalize_embeddings=True, convert_to_numpy=True).astype(np.float32)
+
+def normalize_rows(matrix):
+    """Scale each row to unit length, leaving all-zero rows at zero"""
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    return matrix / np.maximum(norms, 1e-12)
+
+def collect_items():
+    """Texts to embed: scripture verses, curated verses, devotion prayers and declarations, and chat replies"""
+    store = get_content_store()
+    items = []
+    with open(SCRIPTURE_CORPUS, encoding='utf-8') as f:
+        for verse in json.load(f)['verses']:
+            items.append({'kind': 'verse', 'key': verse['reference'], 'text': verse['text'],
+                          'embed': f"{verse.get('topics', '')} {verse['text']}"})
+    for key, verse in store.section('verses').items():
+        items.append({'kind': 'verse', 'key': verse['reference'], 'text': verse['verse'], 'embed': f"{key} {verse['verse']}"})
+    for key, entry in store.section('devotion')['topics'].items():
+        for field in ('prayer', 'declaration'):
+            if field in entry:
+                items.append({'kind': field, 'key': key, 'text': entry[field], 'embed': f"{key} {entry[field]}"})
+    for intent, responses in store.section('responses')['intents'].items():
+        for response in responses:
+            items.append({'kind': 'response', 'key': intent, 'text': response, 'embed': f"{intent} {response}"})
+    return items
+
+def source_fingerprint():
+    """Sizes and mtimes of the content files the index is built from"""
+    store = get_content_store()
+    paths = [SCRIPTURE_CORPUS] + [os.path.join(store.content_dir, f"{name}.json") for name in ('verses', 'devotion', 'responses')]
+    return [[os.path.basename(path), os.stat(path).st_size, os.stat(path).st_mtime_ns] for path in paths]
+
+class SemanticIndex:
+    """Embedding index over content items, searched with one vectorized cosine-similarity pass.
+
+    Embeddings are unit-length float32 rows in a memory-mapped .npy file,
+    grouped by item kind so a kind filter is a contiguous slice. A query
+    (or a batch of queries) is a single matrix product, and top-k uses
+    argpartition so only the k best rows are sorted.
+    """
+
+    def __init__(self, index_dir=SEMANTIC_INDEX_DIR, model_path=SEMANTIC_MODEL, dim=SEMANTIC_DIM):
+        self.index_dir = index_dir
+        self.model_path = model_path
+        self.dim = dim
+        # Reentrant, because a load may need to build first
+        self._lock = threading.RLock()
+        self._loaded = None
+
+    def build(self):
+        """Embed all content items into a new build directory and switch CURRENT to it; returns the item count"""
+        items = collect_items()
+        kinds = sorted({item['kind'] for item in items})
+        items.sort(key=lambda item: kinds.index(item['kind']))
+        texts = [item.pop('embed') for item in items]
+
+        if self.model_path:
+            encoder = ModelEncoder(self.model_path)
+        else:
+            encoder = TfidfSvdEncoder.fit(texts, self.dim)
+        embeddings = encoder.encode(texts).astype(np.float32)
+
+        build_name = f"build-{time.time_ns()}-{os.getpid()}"
+        build_dir = os.path.join(self.index_dir, build_name)
+        os.makedirs(build_dir)
+        np.save(os.path.join(build_dir, 'embeddings.npy'), embeddings)
+        encoder.save(build_dir)
+        ranges = {}
+        for row, item in enumerate(items):
+            start, _ = ranges.get(item['kind'], (row, row))
+            ranges[item['kind']] = (start, row + 1)
+        with open(os.path.join(build_dir, 'items.json'), 'w') as f:
+            json.dump({
+                'encoder': encoder.name,
+                'model': self.model_path,
+                'dim': self.dim,
+                'sources': source_fingerprint(),
+                'ranges': ranges,
+                'items': items
+            }, f)
+
+        # Publish the build atomically, then remove older ones
+        pointer = os.path.join(self.index_dir, 'CURRENT')
+        with open(f"{pointer}.tmp", 'w') as f:
+            f.write(build_name)
+        os.replace(f"{pointer}.tmp", pointer)
+        for name in os.listdir(self.index_dir):
+            if name.startswith('build-') and name != build_name:
+                shutil.rmtree(os.path.join(self.index_dir, name), ignore_errors=True)
+        with self._lock:
+            self._loaded = None
+        return len(items)
+
+    def search(self, query, k=5, kind=None):
+        """Get the k items most similar to one query, best first, as dicts with a 'score'"""
+        return self.search_batch([query], k, kind)[0]
+
+    def search_batch(self, queries, k=5, kind=None):
+        """Get the k most similar items for each of many queries with one matrix product"""
+        encoder, embeddings, meta = self._load()
+        start, stop = meta['ranges'].get(kind, (0, 0)) if kind else (0, len(meta['items']))
+        if stop <= start or not queries:
+            return [[] for _ in queries]
+        scores = encoder.encode(queries) @ embeddings[start:stop].T
+        k = min(k, stop - start)
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+        top_scores = np.take_along_axis(scores, top, axis=1)
+        order = np.argsort(-top_scores, axis=1)
+        results = []
+        for rows, row_scores, row_order in zip(top, top_scores, order):
+            results.append([
+                {**meta['items'][start + rows[i]], 'score': float(row_scores[i])}
+                for i in row_order
+            ])
+        return results
+
+    def best_match(self, query, kind, min_score=SEMANTIC_MIN_SCORE):
+        """Get the most similar item of a kind, or None if nothing scores at least min_score"""
+        results = self.search(query, k=1, kind=kind)
+        return results[0] if results and results[0]['score'] >= min_score else None
+
+    def is_current(self):
+        """Check that a build exists and was made from the current content files and settings"""
+        try:
+            meta = self._read_meta(self._current_dir())
+        except (OSError, ValueError):
+            return False
+        return (meta['sources'] == source_fingerprint() and meta['model'] == self.model_path
+                and meta['dim'] == self.dim)
+
+    def _current_dir(self):
+        with open(os.path.join(self.index_dir, 'CURRENT')) as f:
+            return os.path.join(self.index_dir, f.read().strip())
+
+    @staticmethod
+    def _read_meta(build_dir):
+        with open(os.path.join(build_dir, 'items.json')) as f:
+            return json.load(f)
+
+    def _load(self):
+        """Map the current build into memory, building it first if it is missing or stale"""
+        loaded = self._loaded
+        if loaded is not None:
+            return loaded
+        with self._lock:
+            if self._loaded is None:
+                if not self.is_current():
+                    self.build()
+                build_dir = self._current_dir()
+                meta = self._read_meta(build_dir)
+                if meta['encoder'] == ModelEncoder.name:
+                    encoder = ModelEncoder(meta['model'])
+                else:
+                    encoder = TfidfSvdEncoder.load(build_dir)
+                embeddings = np.load(os.path.join(build_dir, 'embeddings.npy'), mmap_mode='r')
+                self._loaded = (encoder, embeddings, meta)
+            return self._loaded
+
+_semantic_index = None
+_semantic_index_lock = threading.Lock()
+
+def get_semantic_index():
+    """Get the process-wide semantic index, or None if NumPy isn't installed"""
+    global _semantic_index
+    if np is None:
+        return None
+    with _semantic_index_lock:
+        if _semantic_index is None:
+            _semantic_index = SemanticIndex()
+        return _semantic_index
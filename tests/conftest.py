@@ -0,0 +1,11 @@
+import os
+import sys
+import tempfile
+
+# Keep the app modules away from the working copy's database and cache files
+_scratch = tempfile.mkdtemp(prefix='dscpl-tests-')
+os.environ.setdefault('DATABASE_URL', f"sqlite:///{os.path.join(_scratch, 'dscpl.db')}")
+os.environ.setdefault('VIDEO_CACHE_FILE', os.path.join(_scratch, 'video_cache.json'))
+os.environ.setdefault('FLIC_API_URL', 'http://127.0.0.1:9')
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,33 @@
+import asyncio
+from datetime import datetime, timedelta
+
+import pytest
+
+import database
+from async_database import AsyncDatabaseManager, async_driver_available
+from database import Progress
+
+pytestmark = pytest.mark.skipif(not async_driver_available(), reason="no asyncio driver installed")
+
+def test_get_user_progress_since():
+    manager = database.get_db_manager()
+    manager.create_tables()
+    user = manager.get_or_create_user("async_progress_user")
+    now = datetime.utcnow()
+    for days_ago in (0, 2, 5):
+        manager.session.add(Progress(user_id=user.id, category='devotion', topic=f"day {days_ago}",
+                                     completion_date=now - timedelta(days=days_ago), completed=True))
+    manager.session.commit()
+
+    async def load():
+        async_manager = AsyncDatabaseManager()
+        try:
+            return (await async_manager.get_user_progress(user.id, since=now - timedelta(days=3)),
+                    await async_manager.get_user_progress(user.id, days=30))
+        finally:
+            await async_manager.close()
+
+    recent, all_progress = asyncio.run(load())
+
+    assert [progress.topic for progress in recent] == ['day 0', 'day 2']
+    assert [progress.topic for progress in all_progress] == ['day 0', 'day 2', 'day 5']
@@ -0,0 +1,54 @@
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from video import CatalogPrefetcher, VideoCatalogCache, VideoStore
+
+PAGE_SIZE = 10
+
+def make_catalog(total):
+    """Catalog whose only Micah 6:8 video sits on page 4"""
+    catalog = [{'id': i + 1, 'title': f"Psalm 23:1 - The Lord is My Shepherd {i + 1}",
+                'video_link': f"https://example.com/videos/{i + 1}.mp4"} for i in range(total)]
+    catalog[34] = {'id': 35, 'title': "Micah 6:8 - Walk Humbly With Your God",
+                   'video_link': "https://example.com/videos/35.mp4"}
+    return catalog
+
+def make_store(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path / 'videos.db'}")
+    return VideoStore(session_factory=sessionmaker(bind=engine), bind=engine)
+
+def test_prefetcher_syncs_pages_past_the_prefetch_window(tmp_path):
+    catalog = make_catalog(47)
+    requested = []
+
+    def fetcher(page, page_size):
+        requested.append(page)
+        start = (page - 1) * page_size
+        return {'data': catalog[start:start + page_size]}
+
+    cache = VideoCatalogCache(fetcher=fetcher, cache_file=None)
+    store = make_store(tmp_path)
+    prefetcher = CatalogPrefetcher(cache, pages=3, page_size=PAGE_SIZE, store=store)
+    prefetcher.run_once()
+
+    assert prefetcher.last_error is None
+    assert requested == [1, 2, 3, 4, 5]
+    assert store.count() == 47
+    assert prefetcher.last_sync['inserted'] == 47
+    # Only the warm window is kept in memory
+    assert cache.get_stats()['pages_cached'] == 3
+
+    assert store.find("walk humbly")['video_url'] == "https://example.com/videos/35.mp4"
+    assert store.find("Anything", reference="Micah 6:8")['title'].startswith("Micah 6:8")
+
+def test_prefetcher_stops_syncing_at_max_pages(tmp_path):
+    def fetcher(page, page_size):
+        # An API that never returns a short page
+        return {'data': [{'id': page * page_size + i, 'title': f"Video {page}-{i}"} for i in range(page_size)]}
+
+    store = make_store(tmp_path)
+    prefetcher = CatalogPrefetcher(VideoCatalogCache(fetcher=fetcher, cache_file=None), pages=2,
+                                   page_size=PAGE_SIZE, store=store, max_sync_pages=6)
+    prefetcher.run_once()
+
+    assert store.count() == 6 * PAGE_SIZE
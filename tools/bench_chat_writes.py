@@ -0,0 +1,84 @@
+"""Benchmark chat turn persistence strategies.
+
+Runs concurrent "chatters" against a throwaway SQLite database and reports
+turns per second, mean per-turn latency and commits per turn for:
+
+    per-message  two save_chat_message() calls (the original behaviour)
+    turn         save_chat_turn() in 'sync' mode: one transaction per turn
+    group        save_chat_turn() in 'group' mode: shared batch commits
+    async        save_chat_turn() in 'async' mode: write-behind queue
+
+    python tools/bench_chat_writes.py --threads 8 --turns 100
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--threads', type=int, default=8)
+    parser.add_argument('--turns', type=int, default=100, help="turns per thread")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_chat_")
+    os.environ['DATABASE_URL'] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    import database
+
+    db_manager = database.get_db_manager()
+    db_manager.create_tables()
+    user_id = db_manager.get_or_create_user("bench_user").id
+    db_manager.close()
+
+    def per_message(text):
+        db_manager.save_chat_message(user_id, 'user', text)
+        db_manager.save_chat_message(user_id, 'ai', text)
+
+    def turn(text):
+        db_manager.save_chat_turn(user_id, text, text)
+
+    strategies = [('per-message', 'sync', per_message), ('turn', 'sync', turn),
+                  ('group', 'group', turn), ('async', 'async', turn)]
+
+    print(f"{args.threads} threads x {args.turns} turns")
+    print(f"{'strategy':<12} {'turns/s':>10} {'mean ms/turn':>13} {'commits/turn':>13}")
+    for name, mode, save in strategies:
+        database.CHAT_WRITE_MODE = mode
+        queue_commits_before = database.get_chat_write_queue().stats['commits']
+        latencies = []
+        lock = threading.Lock()
+
+        def chatter():
+            local = []
+            for i in range(args.turns):
+                start = time.perf_counter()
+                save(f"message {i}")
+                local.append(time.perf_counter() - start)
+            db_manager.close()
+            with lock:
+                latencies.extend(local)
+
+        threads = [threading.Thread(target=chatter) for _ in range(args.threads)]
+        start = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        database.flush_chat_write_queue(timeout=60)
+        elapsed = time.perf_counter() - start
+
+        total_turns = args.threads * args.turns
+        if name == 'per-message':
+            commits = total_turns * 2
+        elif name == 'turn':
+            commits = total_turns
+        else:
+            commits = database.get_chat_write_queue().stats['commits'] - queue_commits_before
+        mean_ms = sum(latencies) / len(latencies) * 1000
+        print(f"{name:<12} {total_turns / elapsed:>10.0f} {mean_ms:>13.2f} {commits / total_turns:>13.3f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Benchmark the compiled intent matcher against sequential substring scans.
+
+The "substring" classifier reproduces the original get_ai_response logic:
+one any(word in text) scan per intent, in priority order. Inputs are random
+chat-like text of increasing length with no keyword (the worst case for
+both), plus a keyword at the very end.
+
+The compiled matcher is mainly a correctness fix (whole-word matches, so
+'hi' no longer fires inside 'this', and stems such as 'worries'). On
+speed it is roughly at parity: about 2x faster on short messages, and
+0.8x-1.2x from 1k to 100k characters, varying from run to run.
+
+    python tools/bench_intents.py --sizes 100 1000 10000 100000
+"""
+import argparse
+import os
+import random
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from intents import intent_matcher
+
+# Keyword lists of the original if/elif chain, in the same order
+SUBSTRING_INTENTS = [
+    ('fear', ['afraid', 'scared', 'fear', 'terrified', 'frightened']),
+    ('sadness', ['sad', 'depressed', 'down', 'hopeless', 'despair', 'empty']),
+    ('stress', ['stressed', 'worried', 'anxious', 'overwhelmed', 'panic']),
+    ('gratitude', ['thank', 'grateful', 'blessed', 'praise', 'amazing', 'wonderful']),
+    ('prayer', ['pray', 'prayer', 'praying']),
+    ('scripture', ['bible', 'scripture', 'verse', 'word']),
+    ('temptation', ['tempted', 'temptation', 'struggle', 'addiction', 'sin']),
+    ('loneliness', ['lonely', 'alone', 'isolated', 'abandoned']),
+    ('anger', ['angry', 'mad', 'frustrated', 'furious']),
+    ('purpose', ['purpose', 'calling', 'direction', 'lost', 'confused']),
+    ('greeting', ['hello', 'hi', 'hey', 'good morning', 'good evening']),
+    ('help', ['help', 'support', 'advice', 'guidance']),
+]
+
+# Filler words that contain no keyword, even as a substring
+FILLER = ['today', 'we', 'went', 'to', 'the', 'market', 'and', 'bought', 'bread', 'for', 'my', 'family',
+          'it', 'rained', 'all', 'afternoon', 'so', 'stayed', 'at', 'home', 'cooking', 'soup', 'together']
+
+def substring_classify(text):
+    """The original classifier: sequential substring scans per intent"""
+    text = text.lower()
+    for name, words in SUBSTRING_INTENTS:
+        if any(word in text for word in words):
+            return name
+    return None
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000, 100000], help="input lengths in characters")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = random.Random(0)
+    print(f"{'chars':>8} {'input':<14} {'substring us':>13} {'compiled us':>12} {'speedup':>8}")
+    for size in args.sizes:
+        words = []
+        while sum(len(word) + 1 for word in words) < size:
+            words.append(rng.choice(FILLER))
+        filler = ' '.join(words)
+        for label, text in (('no keyword', filler), ('keyword last', filler + ' help')):
+            number = max(1, 100000 // size)
+            substring = min(timeit.repeat(lambda: substring_classify(text), number=number, repeat=args.repeat)) / number
+            compiled = min(timeit.repeat(lambda: intent_matcher.classify(text), number=number, repeat=args.repeat)) / number
+            print(f"{size:>8} {label:<14} {substring * 1e6:>13.1f} {compiled * 1e6:>12.1f} {substring / compiled:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
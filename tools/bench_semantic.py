@@ -0,0 +1,64 @@
+"""Benchmark topic-to-verse lookup strategies.
+
+Compares per-query latency of:
+
+    first-word   the original dict lookup on topic.lower().split()[0]
+    fts          BM25 search in the SQLite FTS5 scripture index
+    semantic     one SemanticIndex.search() call per topic
+    batched      SemanticIndex.search_batch() over all topics at once
+
+Indexes are built into a temporary directory first, so build time is not
+included.
+
+    python tools/bench_semantic.py --queries 5000
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from content import ContentProvider
+from scripture import ScriptureIndex
+from semantic import SemanticIndex, np
+
+WORDS = ['stress', 'fear', 'marriage', 'money', 'grief', 'lonely', 'anger', 'work', 'family', 'healing',
+         'purpose', 'forgive', 'temptation', 'drinking', 'sleep', 'worry', 'hope', 'faith', 'friends', 'peace']
+
+def timed(label, count, run):
+    start = time.perf_counter()
+    run()
+    elapsed = time.perf_counter() - start
+    print(f"{label:<12} {elapsed / count * 1e6:>12.1f} {count / elapsed:>12.0f}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--queries', type=int, default=5000)
+    parser.add_argument('--k', type=int, default=5)
+    args = parser.parse_args()
+
+    if np is None:
+        sys.exit("NumPy is required for the semantic benchmark")
+    rng = random.Random(0)
+    topics = [f"{rng.choice(WORDS)} and {rng.choice(WORDS)} in my life" for _ in range(args.queries)]
+
+    workdir = tempfile.mkdtemp(prefix="bench_semantic_")
+    verses = ContentProvider().verses
+    scripture_index = ScriptureIndex(index_path=os.path.join(workdir, 'scripture.db'))
+    scripture_index.build()
+    semantic_index = SemanticIndex(index_dir=os.path.join(workdir, 'semantic'))
+    semantic_index.build()
+    semantic_index.search("warm up", kind='verse')
+
+    print(f"{args.queries} topics, top {args.k}")
+    print(f"{'strategy':<12} {'us/query':>12} {'queries/s':>12}")
+    timed('first-word', args.queries, lambda: [verses.get(topic.lower().split()[0], verses['peace']) for topic in topics])
+    timed('fts', args.queries, lambda: [scripture_index.search(topic, limit=args.k) for topic in topics])
+    timed('semantic', args.queries, lambda: [semantic_index.search(topic, k=args.k, kind='verse') for topic in topics])
+    timed('batched', args.queries, lambda: semantic_index.search_batch(topics, k=args.k, kind='verse'))
+
+if __name__ == "__main__":
+    main()
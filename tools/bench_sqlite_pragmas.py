@@ -0,0 +1,99 @@
+"""Benchmark SQLite pragma profiles under concurrent readers and writers.
+
+For each profile in database.SQLITE_PRAGMA_PROFILES a fresh database file is
+created and seeded, then writer threads insert progress rows (one commit
+each, like save_progress) while reader threads run the dashboard's recent
+progress query. Reports write and read throughput and lock errors.
+
+    python tools/bench_sqlite_pragmas.py --writers 4 --readers 8 --seconds 5
+"""
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sqlalchemy import create_engine, insert, select
+from sqlalchemy.exc import OperationalError
+from database import (Base, Progress, SQLITE_PRAGMA_PROFILES, get_engine_options,
+                      get_sqlite_pragmas, install_sqlite_pragmas)
+
+def run_profile(profile, args):
+    """Run the workload against a fresh database using one pragma profile"""
+    path = os.path.join(tempfile.mkdtemp(prefix="bench_sqlite_"), f"{profile}.db")
+    url = f"sqlite:///{path}"
+    engine = create_engine(url, **get_engine_options(url))
+    install_sqlite_pragmas(engine, get_sqlite_pragmas(profile))
+    Base.metadata.create_all(bind=engine)
+
+    with engine.begin() as connection:
+        now = datetime.utcnow()
+        connection.execute(insert(Progress), [
+            {'user_id': i % 50, 'category': 'prayer', 'topic': 'seed', 'completion_date': now - timedelta(minutes=i)}
+            for i in range(args.seed_rows)
+        ])
+
+    counts = {'writes': 0, 'reads': 0, 'errors': 0}
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def writer(n):
+        while not stop.is_set():
+            try:
+                with engine.begin() as connection:
+                    connection.execute(insert(Progress).values(
+                        user_id=n % 50, category='devotion', topic='bench', completion_date=datetime.utcnow()
+                    ))
+                key = 'writes'
+            except OperationalError:
+                key = 'errors'
+            with lock:
+                counts[key] += 1
+
+    def reader(n):
+        query = select(Progress).where(
+            Progress.user_id == n % 50,
+            Progress.completion_date >= datetime.utcnow() - timedelta(days=7)
+        ).order_by(Progress.completion_date.desc())
+        while not stop.is_set():
+            try:
+                with engine.connect() as connection:
+                    connection.execute(query).fetchall()
+                key = 'reads'
+            except OperationalError:
+                key = 'errors'
+            with lock:
+                counts[key] += 1
+
+    threads = [threading.Thread(target=writer, args=(i,)) for i in range(args.writers)]
+    threads += [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    engine.dispose()
+
+    return {key: value / args.seconds if key != 'errors' else value for key, value in counts.items()}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--writers', type=int, default=4)
+    parser.add_argument('--readers', type=int, default=8)
+    parser.add_argument('--seconds', type=float, default=5)
+    parser.add_argument('--seed-rows', type=int, default=50000)
+    args = parser.parse_args()
+
+    print(f"{args.writers} writers, {args.readers} readers, {args.seconds:g}s per profile, {args.seed_rows} seed rows")
+    print(f"{'profile':<12} {'writes/s':>10} {'reads/s':>10} {'lock errors':>12}")
+    for profile in SQLITE_PRAGMA_PROFILES:
+        result = run_profile(profile, args)
+        print(f"{profile:<12} {result['writes']:>10.0f} {result['reads']:>10.0f} {result['errors']:>12}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Local stand-in for the Socialverse API.
+
+Serves /posts/summary/get from a generated catalog so the video pages and
+api_client.FlicClient can be exercised without network access:
+
+    python tools/flic_stub_server.py --port 8765 --posts 250
+    FLIC_API_URL=http://127.0.0.1:8765 streamlit run app.py
+"""
+import argparse
+import gzip
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+VERSES = [
+    ('Philippians 4:13', 'I Can Do All Things Through Christ'),
+    ('Psalm 23:1', 'The Lord is My Shepherd'),
+    ('John 3:16', 'For God So Loved the World'),
+    ('Joshua 1:9', 'Be Strong and Courageous'),
+    ('Psalm 46:10', 'Be Still and Know'),
+    ('Isaiah 41:10', 'Do Not Fear'),
+]
+
+def make_catalog(total_posts):
+    """Build a list of fake post summaries"""
+    catalog = []
+    for i in range(total_posts):
+        reference, title = VERSES[i % len(VERSES)]
+        catalog.append({
+            'id': i + 1,
+            'title': f"{reference} - {title}",
+            'video_link': f"https://example.com/videos/{i + 1}.mp4",
+            'upvote_count': i % 17
+        })
+    return catalog
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Request handler for the stub API"""
+
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real API
+
+    def do_GET(self):
+        server = self.server
+        server.request_count += 1
+        url = urlparse(self.path)
+        if server.delay:
+            time.sleep(server.delay)
+        if server.fail:
+            return self._send(503, {'status': 'error', 'message': 'stub failure'})
+        if url.path != '/posts/summary/get':
+            return self._send(404, {'status': 'error', 'message': 'not found'})
+
+        query = parse_qs(url.query)
+        page = int(query.get('page', ['1'])[0])
+        page_size = int(query.get('page_size', ['10'])[0])
+        start = (page - 1) * page_size
+        self._send(200, {
+            'page': page,
+            'page_size': page_size,
+            'data': server.catalog[start:start + page_size]
+        })
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        gzipped = 'gzip' in self.headers.get('Accept-Encoding', '')
+        if gzipped:
+            body = gzip.compress(body)
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        if gzipped:
+            self.send_header('Content-Encoding', 'gzip')
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stub_server(port=0, posts=250, delay=0.0, fail=False):
+    """Start the stub server in a daemon thread and return it with its base URL"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubHandler)
+    server.catalog = make_catalog(posts)
+    server.delay = delay
+    server.fail = fail
+    server.request_count = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--posts', type=int, default=250)
+    parser.add_argument('--delay', type=float, default=0.0, help="seconds to sleep before each response")
+    parser.add_argument('--fail', action='store_true', help="answer every request with 503 to simulate an outage")
+    args = parser.parse_args()
+
+    server, url = start_stub_server(args.port, args.posts, args.delay, args.fail)
+    print(f"Stub Socialverse API listening on {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
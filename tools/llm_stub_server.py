@@ -0,0 +1,115 @@
+"""Local stand-in for an OpenAI-compatible chat completions API.
+
+Serves /v1/chat/completions with canned replies, streamed as server-sent
+events one word at a time, so chat_backend.OpenAIChatBackend and the chat
+page can be exercised without network access or an API key:
+
+    python tools/llm_stub_server.py --port 8766 --first-token-delay 0.3 --token-delay 0.02
+    CHAT_BACKEND=openai CHAT_API_URL=http://127.0.0.1:8766/v1 streamlit run app.py
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+REPLY = ("Thank you for sharing that with me. Whatever you are carrying today, you do not carry it alone. "
+         "Isaiah 41:10 says, 'Fear thou not; for I am with thee: be not dismayed; for I am thy God.' "
+         "Take a slow breath and hand this moment to Him. What would help you most right now?")
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Request handler for the stub API"""
+
+    protocol_version = 'HTTP/1.1'  # keep-alive, like the real API
+
+    def do_POST(self):
+        server = self.server
+        server.request_count += 1
+        body = json.loads(self.rfile.read(int(self.headers.get('Content-Length', 0))) or b'{}')
+        if server.fail:
+            return self._send(503, {'error': {'message': 'stub failure', 'type': 'server_error'}})
+        if self.path.rstrip('/') != '/v1/chat/completions':
+            return self._send(404, {'error': {'message': 'not found', 'type': 'invalid_request_error'}})
+
+        words = REPLY.split(' ')[:body.get('max_tokens') or None]
+        tokens = [word if i == 0 else f" {word}" for i, word in enumerate(words)]
+        completion = {'id': f"chatcmpl-stub-{server.request_count}", 'created': int(time.time()),
+                      'model': body.get('model', 'stub')}
+        usage = {'prompt_tokens': sum(len(m['content'].split()) for m in body.get('messages', [])),
+                 'completion_tokens': len(tokens)}
+        usage['total_tokens'] = usage['prompt_tokens'] + usage['completion_tokens']
+        time.sleep(server.first_token_delay)
+
+        if not body.get('stream'):
+            return self._send(200, {
+                **completion,
+                'object': 'chat.completion',
+                'choices': [{'index': 0, 'message': {'role': 'assistant', 'content': ''.join(tokens)},
+                             'finish_reason': 'stop'}],
+                'usage': usage
+            })
+
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/event-stream')
+        self.send_header('Cache-Control', 'no-cache')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        chunk = {**completion, 'object': 'chat.completion.chunk'}
+        for i, token in enumerate(tokens):
+            if i:
+                time.sleep(server.token_delay)
+            delta = {'role': 'assistant', 'content': token} if i == 0 else {'content': token}
+            self._event({**chunk, 'choices': [{'index': 0, 'delta': delta, 'finish_reason': None}]})
+        self._event({**chunk, 'choices': [{'index': 0, 'delta': {}, 'finish_reason': 'stop'}]})
+        if (body.get('stream_options') or {}).get('include_usage'):
+            self._event({**chunk, 'choices': [], 'usage': usage})
+        self._write_chunk(b'data: [DONE]\n\n')
+        self._write_chunk(b'')
+
+    def _event(self, payload):
+        self._write_chunk(f"data: {json.dumps(payload)}\n\n".encode())
+
+    def _write_chunk(self, data):
+        """Write one HTTP/1.1 chunk; an empty one ends the response"""
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+    def _send(self, status, payload):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+def start_stub_server(port=0, first_token_delay=0.0, token_delay=0.0, fail=False):
+    """Start the stub server in a daemon thread and return it with its base URL"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), StubHandler)
+    server.first_token_delay = first_token_delay
+    server.token_delay = token_delay
+    server.fail = fail
+    server.request_count = 0
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/v1"
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8766)
+    parser.add_argument('--first-token-delay', type=float, default=0.3, help="seconds before the first token")
+    parser.add_argument('--token-delay', type=float, default=0.02, help="seconds between later tokens")
+    parser.add_argument('--fail', action='store_true', help="answer every request with 503 to simulate an outage")
+    args = parser.parse_args()
+
+    server, url = start_stub_server(args.port, args.first_token_delay, args.token_delay, args.fail)
+    print(f"Stub chat completions API listening on {url}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
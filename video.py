@@ -0,0 +1,412 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from datetime import datetime
+from sqlalchemy import bindparam, func, select
+from api_client import CircuitOpenError, get_flic_client
+from database import Base, SessionLocal, Video, VideoKeyword, engine
+
+# Video catalog configuration
+VIDEO_CACHE_TTL = float(os.getenv('VIDEO_CACHE_TTL', '300'))
+VIDEO_CACHE_FILE = os.getenv('VIDEO_CACHE_FILE', 'video_cache.json')
+VIDEO_PAGE_SIZE = int(os.getenv('VIDEO_PAGE_SIZE', '10'))
+VIDEO_NEGATIVE_TTL = float(os.getenv('VIDEO_NEGATIVE_TTL', '15'))
+VIDEO_PREFETCH_INTERVAL = float(os.getenv('VIDEO_PREFETCH_INTERVAL', '240'))
+VIDEO_PREFETCH_PAGES = int(os.getenv('VIDEO_PREFETCH_PAGES', '3'))
+# Upper bound on catalog pages synced into the local video store per prefetch run
+VIDEO_SYNC_MAX_PAGES = int(os.getenv('VIDEO_SYNC_MAX_PAGES', '500'))
+
+VERSE_REFERENCE_PATTERN = re.compile(r"\b((?:[1-3]\s?)?[A-Z][a-z]+(?:\s(?:of\s)?[A-Z][a-z]+)?)\s(\d{1,3}):(\d{1,3})(?:-\d{1,3})?")
+KEYWORD_STOPWORDS = {
+    'a', 'an', 'and', 'are', 'as', 'at', 'be', 'by', 'for', 'from', 'god', 'his', 'i', 'in', 'is',
+    'it', 'me', 'my', 'of', 'on', 'or', 's', 'the', 'to', 'with', 'you', 'your'
+}
+
+def video_url_of(video_item):
+    """Get the playable URL of a catalog item"""
+    return video_item.get('video_url') or video_item.get('url') or video_item.get('video_link')
+
+def extract_verse_reference(text):
+    """Find a verse reference such as 'Philippians 4:13' in text"""
+    match = VERSE_REFERENCE_PATTERN.search(text or '')
+    return match.group(0) if match else None
+
+def extract_keywords(text):
+    """Split text into lowercase keywords, dropping stopwords and numbers"""
+    words = re.findall(r"[a-z]+", (text or '').lower())
+    return {word for word in words if word not in KEYWORD_STOPWORDS and len(word) > 1}
+
+def fetch_video_page(page=1, page_size=VIDEO_PAGE_SIZE):
+    """Fetch one page of the video catalog from the Socialverse API"""
+    return get_flic_client().get_posts_summary(page, page_size)
+
+class RecentFailureError(CircuitOpenError):
+    """Raised instead of fetching a catalog page whose last fetch failed moments ago"""
+
+class VideoCatalogCache:
+    """Caches catalog pages with a TTL, serving stale copies while refreshing in the background"""
+
+    def __init__(self, fetcher=fetch_video_page, ttl=VIDEO_CACHE_TTL, cache_file=VIDEO_CACHE_FILE,
+                 negative_ttl=VIDEO_NEGATIVE_TTL, breaker=None):
+        self.fetcher = fetcher
+        # Circuit breaker of the API behind the fetcher; while it isn't closed, cold pages are fetched in the background
+        self.breaker = breaker
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.cache_file = cache_file
+        self._lock = threading.Lock()
+        self._pages = {}  # (page, page_size) -> (data, fetched_at)
+        self._refreshing = set()
+        self._failures = {}  # (page, page_size) -> (error, failed_at)
+        self.stats = {
+            'hits': 0,
+            'stale_hits': 0,
+            'misses': 0,
+            'negative_hits': 0,
+            'refreshes': 0,
+            'refresh_errors': 0
+        }
+        self._load_from_disk()
+
+    def get(self, page=1, page_size=VIDEO_PAGE_SIZE, wait=True):
+        """Get a catalog page, fetching only when no copy is available.
+
+        With wait=False a cold page returns None straight away and is
+        fetched in the background instead.
+        """
+        key = (page, page_size)
+        with self._lock:
+            data, fetched_at = self._pages.get(key, (None, 0.0))
+            age = time.time() - fetched_at
+            error, failed_at = self._failures.get(key, (None, 0.0))
+            recently_failed = error is not None and time.monotonic() - failed_at < self.negative_ttl
+            if data is None and recently_failed:
+                # The last fetch of this page failed moments ago; don't wait on it again
+                self.stats['negative_hits'] += 1
+                if not wait:
+                    return None
+                raise RecentFailureError(f"Video service is temporarily unavailable: {error}") from error
+            if data is None:
+                self.stats['misses'] += 1
+            elif age < self.ttl:
+                self.stats['hits'] += 1
+            else:
+                self.stats['stale_hits'] += 1
+
+        if data is None:
+            if not wait:
+                self.refresh_in_background(page, page_size)
+                return None
+            if self.breaker is not None and self.breaker.state != self.breaker.CLOSED:
+                # The API is down or being probed; probe from a background thread instead of blocking the caller
+                self.refresh_in_background(page, page_size)
+                raise CircuitOpenError("Video service is temporarily unavailable")
+            # Cold page: the caller has to wait for the first copy
+            return self.refresh(page, page_size)
+        # During an outage keep serving the stale copy instead of starting a refresh that would fail
+        if age >= self.ttl and not recently_failed and not (self.breaker is not None and self.breaker.is_rejecting()):
+            self.refresh_in_background(page, page_size)
+        return data
+
+    def refresh(self, page=1, page_size=VIDEO_PAGE_SIZE):
+        """Fetch a fresh copy of a catalog page and store it"""
+        key = (page, page_size)
+        try:
+            data = self.fetcher(page, page_size)
+        except Exception as e:
+            with self._lock:
+                self.stats['refresh_errors'] += 1
+                self._failures[key] = (e, time.monotonic())
+            raise
+
+        with self._lock:
+            self._pages[key] = (data, time.time())
+            self._failures.pop(key, None)
+            self.stats['refreshes'] += 1
+        self._save_to_disk()
+        return data
+
+    def refresh_in_background(self, page=1, page_size=VIDEO_PAGE_SIZE):
+        """Start a background refresh of a page unless one is already running"""
+        key = (page, page_size)
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+
+        def _run():
+            try:
+                self.refresh(page, page_size)
+            except Exception as e:
+                print(f"Error refreshing video catalog page {page}: {e}")
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+
+        threading.Thread(target=_run, name="video-catalog-refresh", daemon=True).start()
+        return True
+
+    def get_stats(self):
+        """Get cache counters and the age of the oldest cached page"""
+        with self._lock:
+            stats = dict(self.stats)
+            stats['pages_cached'] = len(self._pages)
+            if self._pages:
+                oldest = min(fetched_at for _, fetched_at in self._pages.values())
+                stats['age_seconds'] = round(time.time() - oldest, 1)
+            else:
+                stats['age_seconds'] = None
+        return stats
+
+    def _load_from_disk(self):
+        """Load the last good copy of each page from disk"""
+        if not self.cache_file or not os.path.exists(self.cache_file):
+            return
+        try:
+            with open(self.cache_file, 'r') as f:
+                cached = json.load(f)
+            for entry in cached['pages']:
+                key = (entry['page'], entry['page_size'])
+                self._pages[key] = (entry['data'], entry['fetched_at'])
+        except Exception as e:
+            print(f"Error loading video cache: {e}")
+
+    def _save_to_disk(self):
+        """Save the cached pages to disk, replacing the old file atomically"""
+        if not self.cache_file:
+            return
+        with self._lock:
+            pages = [
+                {'page': page, 'page_size': page_size, 'fetched_at': fetched_at, 'data': data}
+                for (page, page_size), (data, fetched_at) in self._pages.items()
+            ]
+        try:
+            tmp_file = f"{self.cache_file}.{threading.get_ident()}.tmp"
+            with open(tmp_file, 'w') as f:
+                json.dump({'pages': pages}, f)
+            os.replace(tmp_file, self.cache_file)
+        except Exception as e:
+            print(f"Error saving video cache: {e}")
+
+_video_cache = None
+_video_cache_lock = threading.Lock()
+
+def get_video_cache():
+    """Get the process-wide video catalog cache"""
+    global _video_cache
+    with _video_cache_lock:
+        if _video_cache is None:
+            _video_cache = VideoCatalogCache(breaker=get_flic_client().breaker)
+        return _video_cache
+
+def iter_video_catalog(page_size=VIDEO_PAGE_SIZE, cache=None, memory_only_pages=0):
+    """Iterate over catalog videos, fetching each page only when it is reached.
+
+    The first `memory_only_pages` pages are read from the cache only; if one
+    is missing the iteration ends instead of waiting on the network.
+    """
+    cache = cache or get_video_cache()
+    page = 1
+    while True:
+        data = cache.get(page, page_size, wait=page > memory_only_pages)
+        items = (data or {}).get('data') or []
+        for item in items:
+            yield item
+        if len(items) < page_size:
+            return
+        page += 1
+
+class VideoStore:
+    """Local table of catalog videos indexed by title, verse reference and keyword"""
+
+    def __init__(self, session_factory=SessionLocal, bind=engine):
+        self.session_factory = session_factory
+        self.bind = bind
+        Base.metadata.create_all(bind=bind, tables=[Video.__table__, VideoKeyword.__table__])
+
+        # Lookups run on every content page, so their statements are built once
+        columns = (Video.title, Video.video_url, Video.verse_reference)
+        self._by_reference = select(*columns).where(
+            Video.verse_reference == bindparam('reference')
+        ).limit(1)
+        matches = func.count(VideoKeyword.keyword)
+        self._by_keywords = select(*columns).join(
+            VideoKeyword, VideoKeyword.video_id == Video.id
+        ).where(
+            VideoKeyword.keyword.in_(bindparam('keywords', expanding=True))
+        ).group_by(Video.id).order_by(matches.desc(), Video.id).limit(1)
+
+    def upsert(self, video_items):
+        """Insert new catalog items and update changed ones, leaving unchanged rows untouched"""
+        rows = {}
+        for video_item in video_items:
+            external_id = str(video_item.get('id') or video_item.get('slug') or video_url_of(video_item) or '')
+            if not external_id:
+                continue
+            title = (video_item.get('title') or '').strip()[:300]
+            video_url = video_url_of(video_item)
+            content_hash = hashlib.sha1(json.dumps([title, video_url]).encode()).hexdigest()
+            rows[external_id] = (title, video_url, content_hash)
+
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        if not rows:
+            return counts
+
+        with self.session_factory() as session:
+            existing = {
+                video.external_id: video
+                for video in session.query(Video).filter(Video.external_id.in_(list(rows)))
+            }
+            for external_id, (title, video_url, content_hash) in rows.items():
+                video = existing.get(external_id)
+                if video is not None and video.content_hash == content_hash:
+                    counts['unchanged'] += 1
+                    continue
+                if video is None:
+                    video = Video(external_id=external_id)
+                    session.add(video)
+                    counts['inserted'] += 1
+                else:
+                    counts['updated'] += 1
+                video.title = title
+                video.video_url = video_url
+                video.verse_reference = extract_verse_reference(title)
+                video.content_hash = content_hash
+                video.updated_at = datetime.utcnow()
+                video.keywords = [VideoKeyword(keyword=keyword[:50]) for keyword in extract_keywords(title)]
+            session.commit()
+        return counts
+
+    def find(self, topic, reference=None):
+        """Find the video that best matches a verse reference or topic"""
+        reference = reference or extract_verse_reference(topic)
+        keywords = list(extract_keywords(topic))
+        with self.bind.connect() as connection:
+            if reference:
+                row = connection.execute(self._by_reference, {'reference': reference}).first()
+                if row:
+                    return dict(row._mapping)
+            if keywords:
+                row = connection.execute(self._by_keywords, {'keywords': keywords}).first()
+                if row:
+                    return dict(row._mapping)
+        return None
+
+    def count(self):
+        """Get the number of stored videos"""
+        with self.session_factory() as session:
+            return session.query(Video).count()
+
+_video_store = None
+_video_store_lock = threading.Lock()
+
+def get_video_store():
+    """Get the process-wide local video store"""
+    global _video_store
+    with _video_store_lock:
+        if _video_store is None:
+            _video_store = VideoStore()
+        return _video_store
+
+class CatalogPrefetcher:
+    """Background worker that warms the first catalog pages, keeps them fresh and syncs the catalog into the local store"""
+
+    def __init__(self, cache, pages=VIDEO_PREFETCH_PAGES, page_size=VIDEO_PAGE_SIZE,
+                 interval=VIDEO_PREFETCH_INTERVAL, store=None, max_sync_pages=VIDEO_SYNC_MAX_PAGES):
+        self.cache = cache
+        self.store = store
+        self.pages = pages
+        self.max_sync_pages = max_sync_pages
+        self.page_size = page_size
+        self.interval = interval
+        self.last_refresh = None
+        self.last_duration = None
+        self.last_error = None
+        self.last_sync = None
+        self.refresh_count = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Start the worker thread"""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name="video-catalog-prefetch", daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        """Ask the worker thread to exit after its current refresh"""
+        self._stop.set()
+
+    def is_running(self):
+        """Check whether the worker thread is alive"""
+        return self._thread is not None and self._thread.is_alive()
+
+    def run_once(self):
+        """Refresh every prefetched page once, then page through the rest of the catalog into the local store"""
+        start = time.perf_counter()
+        error = None
+        sync = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        last_page = max(self.pages, self.max_sync_pages) if self.store is not None else self.pages
+        for page in range(1, last_page + 1):
+            try:
+                if page <= self.pages:
+                    data = self.cache.refresh(page, self.page_size)
+                else:
+                    # Later pages only feed the store, so they aren't kept in the cache
+                    data = self.cache.fetcher(page, self.page_size)
+            except Exception as e:
+                error = str(e)
+                break
+            items = (data or {}).get('data') or []
+            if self.store is not None and items:
+                # One page at a time, so memory stays flat however large the catalog is
+                try:
+                    for name, count in self.store.upsert(items).items():
+                        sync[name] += count
+                except Exception as e:
+                    error = f"Video store sync failed: {e}"
+                    break
+            if len(items) < self.page_size:
+                break  # reached the end of the catalog
+
+        if self.store is not None:
+            self.last_sync = sync
+
+        self.last_duration = time.perf_counter() - start
+        self.last_refresh = datetime.now()
+        self.last_error = error
+        self.refresh_count += 1
+
+    def get_status(self):
+        """Get the last refresh time, its duration and any error"""
+        return {
+            'running': self.is_running(),
+            'last_refresh': self.last_refresh,
+            'last_duration_ms': round(self.last_duration * 1000, 1) if self.last_duration is not None else None,
+            'last_error': self.last_error,
+            'last_sync': self.last_sync,
+            'refresh_count': self.refresh_count
+        }
+
+    def _run(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"Error prefetching video catalog: {e}")
+            self._stop.wait(self.interval)
+
+_prefetcher = None
+_prefetcher_lock = threading.Lock()
+
+def start_prefetcher():
+    """Start the process-wide catalog prefetcher; later calls return the running one"""
+    global _prefetcher
+    with _prefetcher_lock:
+        if _prefetcher is None:
+            _prefetcher = CatalogPrefetcher(get_video_cache(), store=get_video_store())
+            _prefetcher.start()
+        return _prefetcher